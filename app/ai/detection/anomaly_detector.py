@@ -1,30 +1,81 @@
 
+import hashlib
+import importlib.util
 import logging
 import os
-from typing import List, Dict, Any
+import queue
+import threading
+from typing import List, Dict, Any, Optional
 import numpy as np
 from pathlib import Path
 
-# Import optionnel de YOLO
-try:
-    from ultralytics import YOLO
-    HAS_YOLO = True
-except ImportError:
-    HAS_YOLO = False
+# Import optionnel de YOLO, différé jusqu'au chargement du modèle :
+# ultralytics importe torch, ce qui coûte plusieurs secondes au démarrage de l'UI
+HAS_YOLO = importlib.util.find_spec("ultralytics") is not None
 
 logger = logging.getLogger(__name__)
 
+# Modèles YOLO déjà chargés dans ce processus, par chemin (.pt ou .engine) :
+# une nouvelle analyse réutilise le prédicteur initialisé et les plans cuDNN
+_MODEL_CACHE: Dict[str, Any] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+def _cuda_available() -> bool:
+    """True si PyTorch est installé et voit un GPU CUDA."""
+    try:
+        import torch
+    except ImportError:
+        return False
+    return torch.cuda.is_available()
+
+
 class AnomalyDetector:
     """Détecteur d'anomalies rachidiennes basé sur YOLOv8"""
+
+    # Paramètres d'export du moteur TensorRT (batch dynamique jusqu'à BATCH_SIZE)
+    BATCH_SIZE: int = 16
+    IMGSZ: int = 640
+    # Seuil de confiance, appliqué dans le NMS Ultralytics (sur le device d'inférence)
+    CONF_THRESHOLD: float = 0.4
+    # Coupes écrites pour la calibration INT8 quand aucun jeu n'est configuré
+    CALIBRATION_SLICES: int = 32
     
-    def __init__(self, model_path: str = None):
+    def __init__(
+        self,
+        model_path: str = None,
+        use_tensorrt: bool = False,
+        use_int8: bool = False,
+        calibration_data: Optional[str] = None,
+        num_workers: int = 1,
+        device: Optional[str] = None,
+    ):
+        """
+        Args:
+            model_path       : poids YOLOv8 (.pt) — défaut models/detection/yolov8n.pt
+            use_tensorrt     : exporter/charger un moteur TensorRT FP16 (GPU NVIDIA requis)
+            use_int8         : quantifier le moteur en INT8 (nécessite un jeu de calibration)
+            calibration_data : dataset YAML Ultralytics de coupes CT pour la calibration INT8 ;
+                               à défaut, un jeu est écrit à côté du modèle à partir du
+                               premier volume analysé (INT8 au lancement suivant)
+            num_workers      : processus d'inférence CPU (>1 : un YOLO mono-thread par
+                               processus, volume partagé en mémoire partagée) ;
+                               ignoré quand l'inférence tourne sur GPU
+            device           : 'cpu' ou 'cuda' (None = GPU si disponible)
+        """
         if model_path is None:
             # Chemin par défaut relatif
             base_dir = Path(__file__).parent.parent.parent.parent
             model_path = os.path.join(base_dir, "models", "detection", "yolov8n.pt")
             
         self.model_path = model_path
+        self.use_tensorrt = use_tensorrt
+        self.use_int8 = use_int8
+        self.calibration_data = calibration_data
+        self.num_workers = max(1, int(num_workers))
+        self.device = device
         self.model = None
+        self.half = False
         self._load_model()
 
     def _load_model(self):
@@ -34,21 +85,172 @@ class AnomalyDetector:
             return
 
         if os.path.exists(self.model_path):
+            if self.device is None:
+                self.device = "cuda" if _cuda_available() else "cpu"
             try:
-                self.model = YOLO(self.model_path)
-                logger.info(f"Modèle chargé depuis {self.model_path}")
+                use_engine = self.use_tensorrt and self.device == "cuda"
+                engine_path = self._get_engine_path() if use_engine else None
+                if engine_path is None:
+                    self.half = self._enable_cuda_fast_math()
+                key = engine_path or self.model_path
+                with _MODEL_CACHE_LOCK:
+                    self.model = _MODEL_CACHE.get(key)
+                    if self.model is None:
+                        self.model = self._load_yolo(engine_path)
+                        _MODEL_CACHE[key] = self.model
+                    else:
+                        logger.info(f"Modèle réutilisé depuis le cache ({key})")
             except Exception as e:
                 logger.error(f"Impossible de charger le modèle: {e}")
         else:
             logger.warning(f"Modèle introuvable à {self.model_path}. Le téléchargement sera nécessaire.")
 
-    def detect_anomalies(self, volume: np.ndarray, mask: np.ndarray = None) -> List[Dict[str, Any]]:
+    def _load_yolo(self, engine_path: Optional[str]):
+        """Charge le .pt ou le moteur TensorRT, puis préchauffe l'inférence GPU."""
+        from ultralytics import YOLO
+        if engine_path is not None:
+            # Ultralytics lit task/names depuis les métadonnées du moteur
+            model = YOLO(engine_path, task="detect")
+            logger.info(f"Moteur TensorRT chargé depuis {engine_path}")
+        else:
+            model = YOLO(self.model_path)
+            logger.info(f"Modèle chargé depuis {self.model_path}")
+
+        if engine_path is not None or self.half:
+            # Lot factice à la taille d'export : initialise le prédicteur et laisse
+            # cuDNN choisir ses algorithmes avant la première vraie analyse
+            dummy = [np.zeros((self.IMGSZ, self.IMGSZ, 3), dtype=np.uint8)] * self.BATCH_SIZE
+            model(dummy, verbose=False, half=self.half)
+        return model
+
+    def _enable_cuda_fast_math(self) -> bool:
+        """
+        Active les chemins rapides cuDNN pour le modèle PyTorch sur GPU.
+
+        Retourne True si l'inférence peut tourner en FP16 (Tensor Cores) ;
+        les tailles de lot/image varient peu, d'où cudnn.benchmark.
+        """
+        if self.device != "cuda":
+            return False
+        import torch
+        torch.backends.cudnn.benchmark = True
+        torch.set_float32_matmul_precision("high")
+        return True
+
+    def _default_calibration_yaml(self) -> Path:
+        """Jeu de calibration généré automatiquement, voisin du .pt."""
+        return Path(self.model_path).with_name("calibration") / "calib.yaml"
+
+    def _calibration_yaml(self) -> Optional[str]:
+        """Jeu de calibration INT8 existant (configuré, sinon généré), ou None."""
+        for candidate in (self.calibration_data, self._default_calibration_yaml()):
+            if candidate and os.path.exists(candidate):
+                return str(candidate)
+        return None
+
+    @staticmethod
+    def _calibration_hash(calib_yaml: str) -> str:
+        """Empreinte du YAML et des fichiers de son dossier (noms + contenus)."""
+        digest = hashlib.sha1()
+        root = Path(calib_yaml).parent
+        for path in sorted(p for p in root.rglob("*") if p.is_file()):
+            digest.update(str(path.relative_to(root)).encode())
+            digest.update(path.read_bytes())
+        return digest.hexdigest()[:10]
+
+    def _get_engine_path(self) -> Optional[str]:
+        """
+        Retourne le moteur TensorRT voisin du .pt, en l'exportant une seule fois.
+
+        L'export (FP16, batch dynamique) prend quelques minutes ; le fichier
+        .engine est ensuite réutilisé tel quel aux lancements suivants.
+        Le nom reflète la précision réellement exportée, et pour INT8
+        l'empreinte du jeu de calibration : un nouveau jeu relance l'export.
+        Retourne None si TensorRT/CUDA ne sont pas disponibles.
+        """
+        calib_yaml = self._calibration_yaml() if self.use_int8 else None
+        if self.use_int8 and calib_yaml is None:
+            logger.warning("INT8 demandé sans données de calibration — moteur FP16 ; "
+                           "un jeu de calibration sera écrit lors de la prochaine analyse")
+
+        stem = Path(self.model_path).stem
+        if calib_yaml is not None:
+            name = f"{stem}_int8_{self._calibration_hash(calib_yaml)}.engine"
+        else:
+            name = f"{stem}_fp16.engine"
+        engine_path = str(Path(self.model_path).with_name(name))
+        if os.path.exists(engine_path):
+            return engine_path
+
+        if not _cuda_available():
+            logger.info("CUDA indisponible — moteur TensorRT ignoré")
+            return None
+
+        export_kwargs = dict(
+            format="engine",
+            half=True,
+            dynamic=True,
+            batch=self.BATCH_SIZE,
+            imgsz=self.IMGSZ,
+            device=0,
+        )
+        if calib_yaml is not None:
+            export_kwargs.update(int8=True, data=calib_yaml)
+
+        try:
+            logger.info(f"Export TensorRT ({name}) de {self.model_path}...")
+            from ultralytics import YOLO
+            exported = YOLO(self.model_path).export(**export_kwargs)
+            if exported and os.path.exists(exported):
+                os.replace(exported, engine_path)
+                return engine_path
+        except Exception as e:
+            logger.warning(f"Export TensorRT impossible ({e}) — modèle PyTorch utilisé")
+        return None
+
+    def write_calibration_set(self, volume: np.ndarray, indices: List[int]) -> Optional[str]:
+        """
+        Écrire CALIBRATION_SLICES coupes représentatives et leur dataset YAML.
+
+        Les coupes sont réparties régulièrement sur indices (coupes contenant
+        de l'os) et prétraitées comme pour l'inférence. Retourne le chemin du
+        YAML, ou None si l'écriture échoue.
+        """
+        import cv2
+        import yaml
+
+        calib_yaml = self._default_calibration_yaml()
+        images_dir = calib_yaml.parent / "images"
+        picks = [indices[int(k)] for k in
+                 np.linspace(0, len(indices) - 1, min(self.CALIBRATION_SLICES, len(indices)))]
+        try:
+            images_dir.mkdir(parents=True, exist_ok=True)
+            for i, img in zip(picks, self._preprocess_batch(volume, picks)):
+                cv2.imwrite(str(images_dir / f"slice_{i:04d}.png"), img)
+            names = dict(self.model.names) if self.model is not None else {0: "anomaly"}
+            with open(calib_yaml, "w", encoding="utf-8") as f:
+                yaml.safe_dump({"path": str(calib_yaml.parent), "train": "images",
+                                "val": "images", "names": names}, f)
+        except Exception as e:
+            logger.warning(f"Écriture du jeu de calibration INT8 impossible: {e}")
+            return None
+        logger.info(f"Jeu de calibration INT8 écrit ({len(picks)} coupes) : {calib_yaml}")
+        return str(calib_yaml)
+
+    def detect_anomalies(
+        self,
+        volume: np.ndarray,
+        mask: np.ndarray = None,
+        min_bone_voxels: int = 50,
+    ) -> List[Dict[str, Any]]:
         """
         Détecter des anomalies dans le volume 3D (slice par slice).
         
         Args:
             volume: Array numpy 3D (Z, Y, X)
-            mask: Masque de segmentation optionnel
+            mask: Masque de segmentation optionnel — les coupes avec moins de
+                  min_bone_voxels voxels os ne passent pas dans YOLO
+            min_bone_voxels: seuil de voxels os par coupe (si mask fourni)
             
         Returns:
             Liste de dictionnaires décrivant les anomalies
@@ -71,36 +273,252 @@ class AnomalyDetector:
 
         # Pour optimiser, on ne traite qu'une slice sur 5 ou 10
         step = max(1, len(volume) // 20) 
-        
-        for i in range(0, len(volume), step):
-            slice_img = volume[i]
-            
-            # Normaliser pour YOLO (0-255 uint8)
-            img_normalized = ((slice_img - slice_img.min()) / (slice_img.max() - slice_img.min() + 1e-8) * 255).astype(np.uint8)
-            
-            # Convertir en RGB (3 canaux) pour YOLO
-            img_rgb = np.stack((img_normalized,)*3, axis=-1)
-            
-            # Inférence
-            results = self.model(img_rgb, verbose=False)
-            
-            # Convertir les résultats
-            for r in results:
-                for box in r.boxes:
-                    coords = box.xyxy[0].tolist() # x1, y1, x2, y2
-                    conf = float(box.conf[0])
-                    cls = int(box.cls[0])
-                    label = self.model.names[cls]
-                    
-                    if conf > 0.4: # Seuil de confiance arbitraire
-                        anomalies.append({
-                            'slice_index': i,
-                            'type': label,
-                            'confidence': conf,
-                            'bbox': coords,
-                            'description': f"Possible {label} detected on slice {i}"
-                        })
+        indices = list(range(0, len(volume), step))
+
+        # Pas d'anomalie vertébrale possible sans os : ignorer ces coupes
+        if mask is not None and mask.shape == volume.shape:
+            per_slice_bone = np.count_nonzero(mask[indices].reshape(len(indices), -1), axis=1)
+            kept = [i for i, n in zip(indices, per_slice_bone) if n > min_bone_voxels]
+            if len(kept) < len(indices):
+                logger.info(f"{len(indices) - len(kept)} coupes sans os ignorées "
+                            f"({len(kept)}/{len(indices)} analysées)")
+            indices = kept
+            if not indices:
+                return anomalies
+
+        # INT8 demandé sans jeu de calibration : le constituer depuis ce volume,
+        # le moteur INT8 sera exporté au prochain chargement du modèle
+        if self.use_tensorrt and self.use_int8 and self._calibration_yaml() is None:
+            self.write_calibration_set(volume, indices)
+
+        # Processus multiples : inférence CPU uniquement (sur GPU, chaque
+        # processus créerait son propre contexte CUDA et sa copie du modèle)
+        if self.num_workers > 1 and self.device == "cpu":
+            anomalies = self._detect_multiprocess(volume, indices)
+        else:
+            anomalies = self._detect_pipelined(volume, indices)
 
-        
         logger.info(f"Détection terminée. {len(anomalies)} anomalies trouvées.")
         return anomalies
+
+    def _detect_pipelined(self, volume: np.ndarray, indices: List[int]) -> List[Dict[str, Any]]:
+        """Inférence dans le processus courant, prétraitement en parallèle."""
+        anomalies = []
+
+        # Inférence par lots : un seul appel YOLO pour BATCH_SIZE coupes.
+        # Le prétraitement du lot suivant (thread producteur) se fait pendant
+        # l'inférence du lot courant ; maxsize=2 borne la mémoire.
+        batches: "queue.Queue" = queue.Queue(maxsize=2)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            # put() interruptible si le consommateur s'est arrêté sur erreur
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def producer():
+            try:
+                for b in range(0, len(indices), self.BATCH_SIZE):
+                    batch_indices = indices[b:b + self.BATCH_SIZE]
+                    if not put((batch_indices, self._preprocess_batch(volume, batch_indices))):
+                        return
+            except Exception as e:
+                put(e)
+                return
+            put(None)
+
+        # Sur GPU : copie H2D du lot N+1 (mémoire épinglée, stream dédié)
+        # pendant l'inférence du lot N
+        stage = self._make_cuda_stager(volume.shape[1:])
+
+        worker = threading.Thread(target=producer, name="anomaly-preprocess", daemon=True)
+        worker.start()
+        try:
+            pending = None
+            while True:
+                item = batches.get()
+                if isinstance(item, Exception):
+                    raise item
+                staged = stage(*item) if (stage and item is not None) else item
+
+                if pending is not None:
+                    anomalies.extend(self._infer_batch(*pending))
+                if staged is None:
+                    break
+                pending = staged
+        finally:
+            stop.set()
+            worker.join()
+        return anomalies
+
+    def _infer_batch(self, batch_indices: List[int], source, ready=None) -> List[Dict[str, Any]]:
+        """Inférence YOLO d'un lot (liste d'images uint8 ou tenseur CUDA BCHW)."""
+        if ready is not None:
+            # Attendre la fin de la copie asynchrone sur le stream courant
+            import torch
+            torch.cuda.current_stream().wait_event(ready)
+            # Le tenseur a été alloué sur le stream de copie
+            source.record_stream(torch.cuda.current_stream())
+        elif not isinstance(source, list):
+            source = list(source)
+
+        # Inférence (FP16 sur GPU pour le modèle .pt ; le moteur TensorRT fixe sa précision)
+        results = self.model(source, verbose=False, half=self.half, conf=self.CONF_THRESHOLD)
+
+        # Convertir les résultats
+        anomalies = []
+        for i, r in zip(batch_indices, results):
+            anomalies.extend(self._boxes_to_anomalies(r, i))
+        return anomalies
+
+    def _make_cuda_stager(self, slice_shape):
+        """
+        Retourne stage(batch_indices, imgs_rgb) -> (indices, tenseur CUDA, event),
+        ou None si CUDA n'est pas disponible.
+
+        Les lots sont épinglés puis copiés sur un stream dédié ; l'event
+        permet au stream d'inférence d'attendre uniquement cette copie.
+        Ultralytics exige des tenseurs dont H et W sont multiples de 32.
+        """
+        if any(d % 32 for d in slice_shape) or self.device != "cuda":
+            return None
+
+        import torch
+        device = torch.device("cuda", 0)
+        copy_stream = torch.cuda.Stream(device=device)
+
+        def stage(batch_indices, imgs_rgb):
+            pinned = torch.from_numpy(imgs_rgb).pin_memory()
+            with torch.cuda.stream(copy_stream):
+                gpu = pinned.to(device, non_blocking=True)
+                # NHWC uint8 → NCHW float [0, 1], format attendu par Ultralytics
+                gpu = gpu.permute(0, 3, 1, 2).float().div_(255.0).contiguous()
+                ready = torch.cuda.Event()
+                ready.record(copy_stream)
+            return batch_indices, gpu, ready
+
+        return stage
+
+    def _detect_multiprocess(self, volume: np.ndarray, indices: List[int]) -> List[Dict[str, Any]]:
+        """
+        Inférence CPU répartie sur num_workers processus.
+
+        Le volume est copié une fois en mémoire partagée ; chaque processus
+        charge son propre YOLO (torch limité à 1 thread) et traite des lots
+        d'indices de coupes.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from multiprocessing import get_context, shared_memory
+
+        # Lots plus petits qu'en mono-processus pour occuper tous les processus
+        chunk = max(1, min(self.BATCH_SIZE, -(-len(indices) // self.num_workers)))
+        batches = [indices[b:b + chunk] for b in range(0, len(indices), chunk)]
+
+        shm = shared_memory.SharedMemory(create=True, size=max(volume.nbytes, 1))
+        try:
+            shared = np.ndarray(volume.shape, dtype=volume.dtype, buffer=shm.buf)
+            shared[:] = volume
+            del shared  # libérer la vue avant shm.close()
+
+            anomalies = []
+            with ProcessPoolExecutor(
+                max_workers=min(self.num_workers, len(batches)),
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_path, shm.name, volume.shape, volume.dtype.str),
+            ) as pool:
+                for batch_anomalies in pool.map(_detect_worker, batches):
+                    anomalies.extend(batch_anomalies)
+        finally:
+            shm.close()
+            shm.unlink()
+        return anomalies
+
+    def _preprocess_batch(self, volume: np.ndarray, batch_indices: List[int]) -> np.ndarray:
+        """Normaliser un lot de coupes en images RGB uint8 (N, H, W, 3) pour YOLO."""
+        # Une seule copie float32 contiguë, puis opérations en place
+        sel = np.ascontiguousarray(volume[batch_indices], dtype=np.float32)
+        flat = sel.reshape(len(sel), -1)
+
+        # Normaliser pour YOLO (0-255 uint8), min/max par coupe
+        lo = flat.min(axis=1)[:, None, None]
+        hi = flat.max(axis=1)[:, None, None]
+        sel -= lo
+        sel *= 255.0 / (hi - lo + 1e-8)
+        np.clip(sel, 0, 255, out=sel)
+
+        # Convertir en RGB (3 canaux) : écriture directe dans le buffer uint8
+        rgb = np.empty(sel.shape + (3,), dtype=np.uint8)
+        np.copyto(rgb, sel[..., None], casting="unsafe")
+        return rgb
+
+    def _boxes_to_anomalies(self, result, slice_index: int) -> List[Dict[str, Any]]:
+        """
+        Convertir les boîtes YOLO d'une coupe en dicts d'anomalies.
+
+        Les boîtes sous CONF_THRESHOLD sont déjà écartées par le NMS ; les
+        survivantes sont rapatriées en un seul transfert GPU→CPU par coupe
+        (au lieu de trois petites copies synchrones par boîte).
+        """
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+        boxes = boxes.cpu().numpy()
+
+        anomalies = []
+        for coords, conf, cls in zip(boxes.xyxy.tolist(), boxes.conf.tolist(), boxes.cls.tolist()):
+            if conf > self.CONF_THRESHOLD:
+                label = self.model.names[int(cls)]
+                anomalies.append({
+                    'slice_index': slice_index,
+                    'type': label,
+                    'confidence': conf,
+                    'bbox': coords,  # x1, y1, x2, y2
+                    'description': f"Possible {label} detected on slice {slice_index}"
+                })
+        return anomalies
+
+
+# ──────────────────────────────────────────────────────────────
+# Processus d'inférence (mode num_workers > 1)
+# ──────────────────────────────────────────────────────────────
+
+_worker_detector = None
+_worker_shm = None
+_worker_volume = None
+
+
+def _init_worker(model_path: str, shm_name: str, shape, dtype: str):
+    """Initialiser un processus : torch mono-thread, YOLO local, volume partagé."""
+    global _worker_detector, _worker_shm, _worker_volume
+    os.environ["OMP_NUM_THREADS"] = "1"
+    # Processus CPU : aucun contexte CUDA, même si un GPU est présent
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    from multiprocessing import shared_memory
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_volume = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_worker_shm.buf)
+    _worker_detector = AnomalyDetector(model_path, device="cpu")
+
+
+def _detect_worker(batch_indices: List[int]) -> List[Dict[str, Any]]:
+    """Inférence d'un lot de coupes dans un processus de travail."""
+    det = _worker_detector
+    if det is None or det.model is None:
+        return []
+    imgs_rgb = det._preprocess_batch(_worker_volume, batch_indices)
+    results = det.model(list(imgs_rgb), verbose=False, conf=det.CONF_THRESHOLD, device="cpu")
+    anomalies = []
+    for i, r in zip(batch_indices, results):
+        anomalies.extend(det._boxes_to_anomalies(r, i))
+    return anomalies
@@ -0,0 +1,60 @@
+"""
+Noyaux numériques compilés (Numba) pour la détection des vertèbres.
+Optionnels : si Numba n'est pas installé, HAS_NUMBA vaut False et les
+appelants utilisent leur implémentation NumPy.
+"""
+
+import numpy as np
+
+# Import optionnel de Numba
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def slice_stats_kernel(bone_mask, volume, ny_half):
+        """
+        Réductions par coupe Z en une seule passe parallèle sur le volume.
+
+        Returns:
+            (count, sum_hu, sum_hu2, ant, sum_y, sum_x) — tableaux de taille nz
+        """
+        nz, ny, nx = bone_mask.shape
+        count   = np.zeros(nz, dtype=np.int64)
+        sum_hu  = np.zeros(nz, dtype=np.float64)
+        sum_hu2 = np.zeros(nz, dtype=np.float64)
+        ant     = np.zeros(nz, dtype=np.int64)
+        sum_y   = np.zeros(nz, dtype=np.float64)
+        sum_x   = np.zeros(nz, dtype=np.float64)
+
+        for z in prange(nz):
+            c = 0
+            a = 0
+            s = 0.0
+            s2 = 0.0
+            sy = 0.0
+            sx = 0.0
+            for y in range(ny):
+                for x in range(nx):
+                    if bone_mask[z, y, x]:
+                        v = np.float64(volume[z, y, x])
+                        c += 1
+                        s += v
+                        s2 += v * v
+                        sy += y
+                        sx += x
+                        if y < ny_half:
+                            a += 1
+            count[z] = c
+            sum_hu[z] = s
+            sum_hu2[z] = s2
+            ant[z] = a
+            sum_y[z] = sy
+            sum_x[z] = sx
+
+        return count, sum_hu, sum_hu2, ant, sum_y, sum_x
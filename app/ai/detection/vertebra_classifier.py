@@ -4,8 +4,10 @@ Utilise RandomForestClassifier (scikit-learn) sur des features simples.
 Aucun GPU requis. Entraîné sur des exemples synthétiques intégrés.
 """
 
+import hashlib
 import numpy as np
 import logging
+from pathlib import Path
 from typing import List, Dict, Any
 
 logger = logging.getLogger(__name__)
@@ -44,10 +46,26 @@ CLASS_COLORS = {
 }
 
 
+# Dossier du cache disque du pipeline entraîné
+_CACHE_DIR = Path(__file__).parent.parent.parent.parent / "models" / "classification"
+
+# Pipeline déjà chargé/entraîné dans ce processus (partagé entre instances)
+_CACHED_MODEL = None
+
+
+def _cache_path() -> Path:
+    """Fichier de cache dépendant des données d'entraînement et de la version sklearn."""
+    import sklearn
+    digest = hashlib.sha1(
+        _TRAINING_DATA.tobytes() + _TRAINING_LABELS.tobytes()
+    ).hexdigest()[:12]
+    return _CACHE_DIR / f"vertebra_rf_{sklearn.__version__}_{digest}.joblib"
+
+
 class VertebraClassifier:
     """
     Classifie l'état de chaque vertèbre à partir de ses métriques.
-    Entraîné au démarrage sur une base synthétique (quelques secondes).
+    Entraîné une fois sur une base synthétique, puis rechargé depuis le cache.
     """
 
     def __init__(self):
@@ -56,11 +74,29 @@ class VertebraClassifier:
         self._train()
 
     def _train(self):
+        global _CACHED_MODEL
+        if _CACHED_MODEL is not None:
+            self._model = _CACHED_MODEL
+            self._is_trained = True
+            return
+
         try:
+            import joblib
             from sklearn.ensemble import RandomForestClassifier
             from sklearn.preprocessing import StandardScaler
             from sklearn.pipeline import Pipeline
 
+            cache_path = _cache_path()
+            if cache_path.exists():
+                try:
+                    self._model = joblib.load(cache_path)
+                    self._is_trained = True
+                    _CACHED_MODEL = self._model
+                    logger.info(f"VertebraClassifier chargé depuis {cache_path.name}")
+                    return
+                except Exception as e:
+                    logger.warning(f"Cache classificateur illisible ({e}) — ré-entraînement")
+
             self._model = Pipeline([
                 ("scaler", StandardScaler()),
                 ("clf", RandomForestClassifier(
@@ -72,7 +108,14 @@ class VertebraClassifier:
             ])
             self._model.fit(_TRAINING_DATA, _TRAINING_LABELS)
             self._is_trained = True
+            _CACHED_MODEL = self._model
             logger.info("VertebraClassifier entraîné (RandomForest, 16 exemples)")
+
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                joblib.dump(self._model, cache_path)
+            except OSError as e:
+                logger.warning(f"Impossible d'écrire le cache classificateur : {e}")
         except ImportError:
             logger.warning("scikit-learn non disponible — classification par règles")
         except Exception as e:
@@ -90,20 +133,27 @@ class VertebraClassifier:
         if not vertebrae:
             return vertebrae
 
-        for v in vertebrae:
-            features = np.array([[
+        if self._is_trained and self._model is not None:
+            # Une seule prédiction pour toutes les vertèbres
+            X = np.array([[
                 v.get("hu_mean", 400),
                 v.get("hu_std", 80),
                 v.get("height_mm", 25),
                 v.get("compression_ratio", 1.0),
                 v.get("bone_fraction", 5.0),
-            ]], dtype=np.float32)
-
-            if self._is_trained and self._model is not None:
-                pred  = int(self._model.predict(features)[0])
-                proba = self._model.predict_proba(features)[0]
-                conf  = float(proba[pred])
-                ml_status = CLASS_NAMES.get(pred, "unknown")
+            ] for v in vertebrae], dtype=np.float32)
+
+            proba = self._model.predict_proba(X)
+            best  = proba.argmax(axis=1)
+            preds = self._model.classes_[best]
+            confs = proba[np.arange(len(X)), best]
+        else:
+            preds = confs = None
+
+        for idx, v in enumerate(vertebrae):
+            if preds is not None:
+                ml_status = CLASS_NAMES.get(int(preds[idx]), "unknown")
+                conf = float(confs[idx])
             else:
                 # Fallback par règles
                 ml_status = v.get("status", "normal")
@@ -10,6 +10,8 @@ from typing import List, Dict, Any, Tuple, Optional
 from scipy.ndimage import gaussian_filter1d
 from scipy.signal import find_peaks
 
+from app.ai.detection.kernels import HAS_NUMBA
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,10 +44,18 @@ class VertebraDetector:
         min_vertebra_slices: int = 3,
         gaussian_sigma: float = 2.0,
         min_peak_prominence: float = 0.1,
+        profile_stride: int = 1,
     ):
+        """
+        Args:
+            profile_stride : sous-échantillonnage XY pour le profil Z ; 1 compte
+                             tous les voxels, >1 est plus rapide mais peut
+                             décaler une limite vertébrale d'environ une coupe
+        """
         self.min_vertebra_slices = min_vertebra_slices
         self.sigma = gaussian_sigma
         self.prominence = min_peak_prominence
+        self.profile_stride = max(1, int(profile_stride))
 
     def detect(
         self,
@@ -79,9 +89,12 @@ class VertebraDetector:
         dz, dy, dx = spacing
         nz = bone_mask.shape[0]
 
-        # 1. Profil osseux sur Z
-        profile = bone_mask.sum(axis=(1, 2)).astype(float)
-        if profile.max() < 10:
+        # 1. Profil osseux sur Z (comptage direct sur une grille XY réduite ;
+        #    le profil est normalisé ensuite, l'échelle n'importe pas)
+        bone_mask = np.ascontiguousarray(bone_mask, dtype=bool)
+        st = self.profile_stride
+        profile = np.count_nonzero(bone_mask[:, ::st, ::st], axis=(1, 2)).astype(np.float64)
+        if profile.max() * st * st < 10:
             logger.warning("Profil osseux vide — aucune vertèbre détectée")
             return []
 
@@ -120,15 +133,16 @@ class VertebraDetector:
         n = len(vertebrae_raw)
         labels = self._assign_labels(n)
 
-        # 6. Calculer les métriques
-        vertebrae = []
-        for idx, ((z0, z1), label) in enumerate(zip(vertebrae_raw, labels)):
-            v = self._compute_metrics(
-                z0, z1, label, bone_mask, volume, spacing
-            )
-            vertebrae.append(v)
-            logger.debug(f"  {label}: z=[{z0},{z1}], H={v['height_mm']:.1f}mm, "
-                         f"HU={v['hu_mean']:.0f}, status={v['status']}")
+        # 6. Calculer les métriques (réductions par coupe en une passe,
+        #    puis sommes sur [z0, z1) pour chaque vertèbre)
+        slice_stats = self._compute_slice_stats(bone_mask, volume)
+        vertebrae = self._compute_metrics_batch(
+            vertebrae_raw, labels, bone_mask.shape, slice_stats, spacing
+        )
+        for v in vertebrae:
+            logger.debug(f"  {v['label']}: z=[{v['z_start']},{v['z_end']}], "
+                         f"H={v['height_mm']:.1f}mm, HU={v['hu_mean']:.0f}, "
+                         f"status={v['status']}")
 
         logger.info(f"Détection terminée : {len(vertebrae)} vertèbres")
         return vertebrae
@@ -150,65 +164,136 @@ class VertebraDetector:
             return ALL_LABELS[:n]
         return [f"V{i+1}" for i in range(n)]
 
-    def _compute_metrics(
+    def _compute_slice_stats(
         self,
-        z0: int, z1: int,
-        label: str,
         bone_mask: np.ndarray,
         volume: np.ndarray,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Réductions par coupe Z sur tout le volume, en une seule lecture
+        (noyau Numba parallèle si disponible, sinon NumPy).
+
+        Chaque tableau est de taille nz ; les métriques d'une vertèbre
+        s'obtiennent ensuite par simple somme sur sa plage [z0, z1).
+        """
+        nz, ny, nx = bone_mask.shape
+        ny_half = ny // 2
+
+        if HAS_NUMBA:
+            from app.ai.detection.kernels import slice_stats_kernel
+            count, sum_hu, sum_hu2, ant, sum_y, sum_x = slice_stats_kernel(
+                np.ascontiguousarray(bone_mask), np.ascontiguousarray(volume), ny_half
+            )
+        else:
+            # Comptes par ligne (z, y) et par colonne (z, x) : donnent le
+            # nombre de voxels, la moitié antérieure et les sommes de coordonnées
+            rows = np.count_nonzero(bone_mask, axis=2)
+            cols = np.count_nonzero(bone_mask, axis=1)
+
+            count   = rows.sum(axis=1)
+            ant     = rows[:, :ny_half].sum(axis=1)
+            sum_y   = rows @ np.arange(ny, dtype=np.float64)
+            sum_x   = cols @ np.arange(nx, dtype=np.float64)
+            # Sommes HU sur l'os par coupe : einsum pondère directement par
+            # le masque, sans extraire volume[bone_mask] ni créer volume*mask
+            sum_hu  = np.einsum("zyx,zyx->z", volume, bone_mask, dtype=np.float64)
+            sum_hu2 = np.einsum("zyx,zyx,zyx->z", volume, volume, bone_mask, dtype=np.float64)
+
+        return {
+            "count":   count,
+            "sum_hu":  sum_hu,
+            "sum_hu2": sum_hu2,
+            "ant":     ant,
+            "post":    count - ant,
+            "sum_y":   sum_y,
+            "sum_x":   sum_x,
+        }
+
+    def _compute_metrics_batch(
+        self,
+        bounds: List[Tuple[int, int]],
+        labels: List[str],
+        shape: Tuple[int, int, int],
+        slice_stats: Dict[str, np.ndarray],
         spacing: Tuple[float, float, float],
-    ) -> Dict[str, Any]:
+    ) -> List[Dict[str, Any]]:
+        """
+        Métriques de toutes les vertèbres à la fois (tableaux par vertèbre).
+
+        Les sommes sur [z0, z1) sont des différences de sommes cumulées des
+        réductions par coupe ; la classification est vectorisée elle aussi.
+        """
         dz, dy, dx = spacing
-        nz, ny, nx = bone_mask.shape
+        nz, ny, nx = shape
+        z0 = np.array([b[0] for b in bounds], dtype=np.int64)
+        z1 = np.array([b[1] for b in bounds], dtype=np.int64)
 
-        region_mask = bone_mask[z0:z1]
-        region_vol  = volume[z0:z1]
+        def range_sum(per_slice: np.ndarray) -> np.ndarray:
+            prefix = np.concatenate(([0.0], np.cumsum(per_slice, dtype=np.float64)))
+            return prefix[z1] - prefix[z0]
 
-        hu_vals = region_vol[region_mask]
-        hu_mean = float(hu_vals.mean()) if len(hu_vals) > 0 else 0.0
-        hu_std  = float(hu_vals.std())  if len(hu_vals) > 0 else 0.0
-        bone_fraction = float(region_mask.mean())
+        n_slices = z1 - z0
+        n_bone   = range_sum(slice_stats["count"])
+        has_bone = n_bone > 0
+        safe_n   = np.where(has_bone, n_bone, 1.0)
 
-        height_mm = (z1 - z0) * dz
+        hu_mean = np.where(has_bone, range_sum(slice_stats["sum_hu"]) / safe_n, 0.0)
+        hu_var  = range_sum(slice_stats["sum_hu2"]) / safe_n - hu_mean ** 2
+        hu_std  = np.where(has_bone, np.sqrt(np.maximum(hu_var, 0.0)), 0.0)
+        bone_fraction = n_bone / np.maximum(n_slices * ny * nx, 1)
 
-        # Centroïde
-        if region_mask.any():
-            coords = np.array(np.where(region_mask))
-            c_local = coords.mean(axis=1)
-            centroid = (c_local[0] + z0, c_local[1], c_local[2])
-        else:
-            centroid = ((z0 + z1) / 2, ny / 2, nx / 2)
+        height_mm = n_slices * dz
+
+        # Centroïde (sommes de coordonnées par coupe, sans np.where)
+        z_idx = np.arange(nz, dtype=np.float64)
+        cz = np.where(has_bone, range_sum(slice_stats["count"] * z_idx) / safe_n, (z0 + z1) / 2)
+        cy = np.where(has_bone, range_sum(slice_stats["sum_y"]) / safe_n, ny / 2)
+        cx = np.where(has_bone, range_sum(slice_stats["sum_x"]) / safe_n, nx / 2)
 
         # Ratio compression : hauteur anterieure vs posterieure
-        ny_half = ny // 2
-        ant  = region_mask[:, :ny_half, :].sum(axis=0)  # moitié antérieure
-        post = region_mask[:, ny_half:, :].sum(axis=0)  # moitié postérieure
-        h_ant  = float(ant.sum())  / max((z1-z0)*nx, 1)
-        h_post = float(post.sum()) / max((z1-z0)*nx, 1)
-        comp_ratio = h_ant / max(h_post, 0.001)
+        denom  = np.maximum(n_slices * nx, 1)
+        h_ant  = range_sum(slice_stats["ant"])  / denom
+        h_post = range_sum(slice_stats["post"]) / denom
+        comp_ratio = h_ant / np.maximum(h_post, 0.001)
 
         # Classification simple
-        status = self._classify(hu_mean, comp_ratio, height_mm)
+        statuses = self._classify_batch(hu_mean, comp_ratio)
 
-        return {
-            "label":            label,
-            "z_start":          int(z0),
-            "z_end":            int(z1),
-            "height_mm":        round(height_mm, 1),
-            "centroid_px":      tuple(float(c) for c in centroid),
-            "hu_mean":          round(hu_mean, 1),
-            "hu_std":           round(hu_std, 1),
-            "bone_fraction":    round(bone_fraction * 100, 2),
-            "compression_ratio": round(comp_ratio, 3),
-            "status":           status,
-        }
+        return [
+            {
+                "label":            label,
+                "z_start":          int(z0[i]),
+                "z_end":            int(z1[i]),
+                "height_mm":        round(float(height_mm[i]), 1),
+                "centroid_px":      (float(cz[i]), float(cy[i]), float(cx[i])),
+                "hu_mean":          round(float(hu_mean[i]), 1),
+                "hu_std":           round(float(hu_std[i]), 1),
+                "bone_fraction":    round(float(bone_fraction[i]) * 100, 2),
+                "compression_ratio": round(float(comp_ratio[i]), 3),
+                "status":           statuses[i],
+            }
+            for i, label in enumerate(labels)
+        ]
 
-    def _classify(self, hu_mean: float, comp_ratio: float, height_mm: float) -> str:
-        """Classification simple basée sur des seuils cliniques."""
-        if comp_ratio < 0.7:
-            return "comprimée"
-        if hu_mean < 150:
-            return "ostéopénique"
-        if abs(comp_ratio - 1.0) > 0.25:
-            return "suspect"
-        return "normal"
+    # Seuils cliniques : compression si ratio ant/post < 0.7, ostéopénie si
+    # HU moyen < 150, suspect si le ratio s'écarte de 1 de plus de 0.25
+    COMPRESSION_THRESHOLD: float = 0.7
+    OSTEOPENIA_HU: float = 150
+    SUSPECT_DEVIATION: float = 0.25
+
+    def _classify_batch(self, hu_mean: np.ndarray, comp_ratio: np.ndarray) -> List[str]:
+        """
+        Classification par seuils cliniques, pour toutes les vertèbres à la fois.
+
+        Règles évaluées dans l'ordre (la première vérifiée l'emporte) :
+        comprimée, ostéopénique, suspect, sinon normal.
+        """
+        return list(np.select(
+            [
+                comp_ratio < self.COMPRESSION_THRESHOLD,
+                hu_mean < self.OSTEOPENIA_HU,
+                np.abs(comp_ratio - 1.0) > self.SUSPECT_DEVIATION,
+            ],
+            ["comprimée", "ostéopénique", "suspect"],
+            default="normal",
+        ).tolist())
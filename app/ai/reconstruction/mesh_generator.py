@@ -1,41 +1,76 @@
 """
 MeshGenerator — Génération de maillage 3D par Marching Cubes.
-Utilise scikit-image et PyVista. Aucun GPU requis.
+Utilise VTK Flying Edges (via PyVista), avec scikit-image en repli. Aucun GPU requis.
 """
 
+import os
 import numpy as np
 import logging
 from typing import Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Nombre de threads VTK SMP déjà configuré dans ce processus (None = pas encore)
+_VTK_SMP_THREADS: Optional[int] = None
+
+
+def _init_vtk_smp(n_threads: Optional[int] = None):
+    """
+    Active le backend multi-thread de VTK (Flying Edges, décimation, normales).
+
+    Les wheels VTK sont livrées avec le backend « Sequential » par défaut :
+    sans ce réglage, tous les filtres SMP tournent sur un seul cœur.
+    La variable VTK_SMP_BACKEND_IN_USE, si définie, reste prioritaire.
+    """
+    global _VTK_SMP_THREADS
+    n_threads = n_threads or os.cpu_count() or 1
+    if _VTK_SMP_THREADS == n_threads:
+        return
+    try:
+        from vtkmodules.vtkCommonCore import vtkSMPTools
+    except ImportError:
+        return
+    if "VTK_SMP_BACKEND_IN_USE" not in os.environ and vtkSMPTools.GetBackend() == "Sequential":
+        vtkSMPTools.SetBackend("STDThread")
+    vtkSMPTools.Initialize(n_threads)
+    _VTK_SMP_THREADS = n_threads
+    logger.debug(f"VTK SMP : backend {vtkSMPTools.GetBackend()}, {n_threads} threads")
+
 
 class MeshGenerator:
     """
     Génère un maillage 3D (pv.PolyData) depuis un volume numpy binaire ou scalaire.
 
-    Utilise l'algorithme Marching Cubes (Lorensen 1987) via scikit-image.
-    Post-processing : décimation, calcul des normales.
+    Isosurface par Flying Edges (VTK, multi-thread) — même contrat que le
+    Marching Cubes (Lorensen 1987) de scikit-image, utilisé en repli.
+    Post-processing : décimation, lissage de Taubin, calcul des normales.
     """
 
+    # Lissage de Taubin : itérations maximales et bande passante du filtre
+    TAUBIN_MAX_ITER: int = 15
+    TAUBIN_PASS_BAND: float = 0.1
+
     def __init__(
         self,
         level: float = 0.5,
         step_size: int = 2,
         decimate_ratio: float = 0.3,
         smooth_iterations: int = 20,
+        n_threads: Optional[int] = None,
     ):
         """
         Args:
             level           : isovaleur (0–1 si volume normalisé, 0.5 = frontière os)
             step_size       : pas de sous-échantillonnage (1=tous les voxels, 2=1/8)
             decimate_ratio  : fraction de triangles à supprimer (0=rien, 0.9=beaucoup)
-            smooth_iterations: iterations de lissage Laplacien sur le mesh
+            smooth_iterations: iterations de lissage (Taubin) sur le mesh
+            n_threads       : threads VTK SMP (None = tous les cœurs)
         """
         self.level = level
         self.step_size = step_size
         self.decimate_ratio = decimate_ratio
         self.smooth_iterations = smooth_iterations
+        self.n_threads = n_threads
 
     def generate(
         self,
@@ -54,25 +89,150 @@ class MeshGenerator:
         Returns:
             pv.PolyData : maillage prêt pour VolumeViewer, ou None si erreur
         """
+        iso = level if level is not None else self.level
+        return self._generate(volume, spacing, iso, max(1, int(self.step_size)))
+
+    def generate_from_mask(
+        self,
+        mask: np.ndarray,
+        spacing: Tuple[float, float, float] = (1.0, 1.0, 1.0),
+    ):
+        """
+        Génère un maillage depuis un masque binaire (bool numpy).
+        Préférable pour un contrôle précis de la segmentation.
+
+        Avec step_size > 1, le masque recadré est réduit par maximum sur des
+        blocs step³ (au lieu d'un échantillonnage un voxel sur step) : le
+        contour parcourt step³ fois moins de voxels et les structures fines
+        (corticale) ne disparaissent pas entre deux échantillons.
+        """
+        step = max(1, int(self.step_size))
+        if step == 1:
+            return self._generate(mask, spacing, 0.5, 1)
+
+        sub, origin = self._crop_to_surface(mask, 0.5, spacing, step)
+        pooled = self._block_max(sub, step)
+        # Chaque voxel réduit est centré sur son bloc d'origine
+        offset = tuple(o + (step - 1) / 2 * float(sp) for o, sp in zip(origin, spacing))
+        spacing_pooled = tuple(float(sp) * step for sp in spacing)
+        return self._generate(pooled, spacing_pooled, 0.5, 1, offset)
+
+    # ------------------------------------------------------------------
+    # Privé
+    # ------------------------------------------------------------------
+
+    def _generate(self, volume: np.ndarray, spacing, iso: float, step: int,
+                  offset=(0.0, 0.0, 0.0)):
+        """Recadrage, isosurface au pas step puis post-processing."""
+        _init_vtk_smp(self.n_threads)
+
+        # Recadrer sur la zone contenant l'isosurface : le fond n'est pas parcouru
+        vol, origin = self._crop_to_surface(volume, iso, spacing, step)
+        if vol.dtype == bool:
+            # Masque : vue uint8 sans copie (VTK ne lit pas le bool, et un
+            # champ float32 quadruplerait les octets parcourus par le contour)
+            vol = vol.view(np.uint8)
+        else:
+            vol = vol.astype(np.float32, copy=False)
+        origin = tuple(o + d for o, d in zip(origin, offset))
+
+        logger.info(f"Marching Cubes — shape={volume.shape} → {vol.shape}, level={iso}, "
+                    f"step={step}")
+
+        # Flying Edges (VTK, multi-thread) en priorité, scikit-image en repli
+        mesh = self._contour_flying_edges(vol, iso, spacing, origin, step)
+        if mesh is None:
+            mesh = self._contour_skimage(vol, iso, spacing, origin, step)
+        if mesh is None:
+            return None
+
+        logger.info(f"Mesh brut : {mesh.n_points:,} sommets, {mesh.n_cells:,} triangles")
+
+        if mesh.n_points < 10:
+            logger.warning("Mesh insuffisant — vérifier le seuillage HU")
+            return None
+
+        # Post-processing
+        mesh = self._postprocess(mesh)
+
+        logger.info(f"Mesh final : {mesh.n_points:,} sommets, {mesh.n_cells:,} triangles")
+        return mesh
+
+    @staticmethod
+    def _block_max(mask: np.ndarray, step: int) -> np.ndarray:
+        """
+        Réduction d'un masque par blocs step³ : True si un voxel du bloc l'est.
+        OU en place des step³ vues décalées (pas de copie du masque complet).
+        """
+        shape = tuple(-(-d // step) for d in mask.shape)
+        out = np.zeros(shape, dtype=bool)
+        for dz in range(step):
+            for dy in range(step):
+                for dx in range(step):
+                    view = mask[dz::step, dy::step, dx::step]
+                    out[:view.shape[0], :view.shape[1], :view.shape[2]] |= view
+        return out
+
+    def _crop_to_surface(self, volume: np.ndarray, iso: float, spacing, step: int):
+        """
+        Recadre le volume sur la boîte englobante des voxels >= iso, avec une
+        marge d'un pas (l'isosurface passe entre ces voxels et leurs voisins).
+
+        Le début de la boîte est aligné sur step pour conserver la même
+        grille d'échantillonnage. Retourne (sous-volume, origine en mm).
+        """
+        inside = volume >= iso
+        if not inside.any() or inside.all():
+            return volume, (0.0, 0.0, 0.0)
+
+        slices, origin = [], []
+        for axis in range(3):
+            other = tuple(a for a in range(3) if a != axis)
+            idx = np.flatnonzero(inside.any(axis=other))
+            start = max(int(idx[0]) - step, 0) // step * step
+            stop = min(int(idx[-1]) + step + 1, volume.shape[axis])
+            slices.append(slice(start, stop))
+            origin.append(start * float(spacing[axis]))
+        return volume[tuple(slices)], tuple(origin)
+
+    def _contour_flying_edges(self, vol: np.ndarray, iso: float, spacing,
+                              origin=(0.0, 0.0, 0.0), step: int = 1):
+        """
+        Isosurface via vtkFlyingEdges3D (parallélisé par VTK SMP).
+
+        Les axes du volume (z, y, x) sont conservés tels quels comme axes
+        (X, Y, Z) VTK, pour des coordonnées identiques à scikit-image.
+        Retourne None si VTK échoue (le repli scikit-image prend le relais).
+        """
         import pyvista as pv
 
+        if step > 1:
+            vol = vol[::step, ::step, ::step]
+        try:
+            grid = pv.wrap(vol)
+            grid.spacing = tuple(float(s) * step for s in spacing)
+            grid.origin = origin
+            mesh = grid.contour([iso], method='flying_edges', compute_scalars=False)
+        except Exception as e:
+            logger.warning(f"Flying Edges indisponible ({e}) — repli scikit-image")
+            return None
+        return mesh
+
+    def _contour_skimage(self, vol: np.ndarray, iso: float, spacing,
+                         origin=(0.0, 0.0, 0.0), step: int = 1):
+        """Isosurface via scikit-image (mono-thread)."""
         try:
             from skimage.measure import marching_cubes
         except ImportError:
             logger.error("scikit-image non installé — pip install scikit-image")
             return None
 
-        iso = level if level is not None else self.level
-        vol = volume.astype(np.float32)
-
-        logger.info(f"Marching Cubes — shape={vol.shape}, level={iso}, step={self.step_size}")
-
         try:
             verts, faces, normals, values = marching_cubes(
                 vol,
                 level=iso,
                 spacing=spacing,          # mm par voxel
-                step_size=self.step_size,
+                step_size=step,
                 allow_degenerate=False,
                 gradient_direction='ascent',  # os = valeurs hautes
             )
@@ -80,50 +240,26 @@ class MeshGenerator:
             logger.error(f"Marching Cubes échec : {e}")
             return None
 
-        n_verts = len(verts)
-        n_faces = len(faces)
-        logger.info(f"Mesh brut : {n_verts:,} sommets, {n_faces:,} triangles")
-
-        if n_verts < 10:
-            logger.warning("Mesh insuffisant — vérifier le seuillage HU")
-            return None
+        verts += np.asarray(origin, dtype=verts.dtype)
 
         # Construire le PolyData PyVista
-        mesh = self._build_polydata(verts, faces, normals)
-
-        # Post-processing
-        mesh = self._postprocess(mesh)
-
-        logger.info(f"Mesh final : {mesh.n_points:,} sommets, {mesh.n_cells:,} triangles")
-        return mesh
-
-    def generate_from_mask(
-        self,
-        mask: np.ndarray,
-        spacing: Tuple[float, float, float] = (1.0, 1.0, 1.0),
-    ):
-        """
-        Génère un maillage depuis un masque binaire (bool numpy).
-        Préférable pour un contrôle précis de la segmentation.
-        """
-        return self.generate(mask.astype(np.float32), spacing=spacing, level=0.5)
-
-    # ------------------------------------------------------------------
-    # Privé
-    # ------------------------------------------------------------------
+        return self._build_polydata(verts, faces, normals)
 
     def _build_polydata(self, verts, faces, normals):
         """Construit un pv.PolyData depuis les résultats Marching Cubes."""
         import pyvista as pv
 
-        # PyVista attend des faces au format [n_pts, v0, v1, v2, ...]
-        n_faces = len(faces)
-        face_arr = np.hstack([
-            np.full((n_faces, 1), 3, dtype=np.int64),
-            faces.astype(np.int64)
-        ])
-
-        mesh = pv.PolyData(verts, face_arr)
+        if hasattr(pv.PolyData, 'from_regular_faces'):
+            # PyVista >= 0.43 : connectivité (n_faces, 3) passée telle quelle à
+            # vtkCellArray, sans construire le tableau plat [3, v0, v1, v2, ...]
+            mesh = pv.PolyData.from_regular_faces(verts, faces)
+        else:
+            # Format plat [n_pts, v0, v1, v2, ...] écrit dans un buffer (n_faces, 4)
+            n_faces = len(faces)
+            face_arr = np.empty((n_faces, 4), dtype=np.int64)
+            face_arr[:, 0] = 3
+            face_arr[:, 1:] = faces
+            mesh = pv.PolyData(verts, face_arr.ravel())
 
         # Normales
         if normals is not None and len(normals) == len(verts):
@@ -132,13 +268,17 @@ class MeshGenerator:
         return mesh
 
     def _postprocess(self, mesh):
-        """Décimation + lissage Laplacien."""
+        """Décimation + lissage Taubin + normales."""
         try:
             # Décimation (réduit le nombre de polygones)
             if self.decimate_ratio > 0 and mesh.n_cells > 5000:
                 mesh = mesh.decimate(self.decimate_ratio)
                 logger.debug(f"Après décimation: {mesh.n_cells:,} triangles")
 
+            # Lissage (avant les normales, pour qu'elles correspondent à la surface finale)
+            if self.smooth_iterations > 0:
+                mesh = self._smooth_taubin(mesh)
+
             # Calcul des normales de surface
             mesh = mesh.compute_normals(
                 cell_normals=True,
@@ -148,11 +288,28 @@ class MeshGenerator:
                 non_manifold_traversal=False,
             )
 
-            # Lissage
-            if self.smooth_iterations > 0:
-                mesh = mesh.smooth(n_iter=self.smooth_iterations, relaxation_factor=0.1)
-
         except Exception as e:
             logger.warning(f"Post-processing partiel : {e}")
 
         return mesh
+
+    def _smooth_taubin(self, mesh):
+        """
+        Lissage de Taubin (filtre sinc fenêtré de VTK) : conserve le volume et
+        converge en moins d'itérations que le Laplacien, d'où le plafond
+        TAUBIN_MAX_ITER sur smooth_iterations.
+        """
+        n_iter = min(self.smooth_iterations, self.TAUBIN_MAX_ITER)
+        if hasattr(mesh, 'smooth_taubin'):
+            return mesh.smooth_taubin(n_iter=n_iter, pass_band=self.TAUBIN_PASS_BAND)
+
+        # PyVista ancien : filtre VTK direct
+        import pyvista as pv
+        import vtk
+        flt = vtk.vtkWindowedSincPolyDataFilter()
+        flt.SetInputData(mesh)
+        flt.SetNumberOfIterations(n_iter)
+        flt.SetPassBand(self.TAUBIN_PASS_BAND)
+        flt.NormalizeCoordinatesOn()
+        flt.Update()
+        return pv.wrap(flt.GetOutput())
@@ -3,13 +3,61 @@ BoneSegmenter — Segmentation des structures osseuses par seuillage HU.
 Approche algorithmique pure, sans modèle IA.
 """
 
+import os
 import numpy as np
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple
 
+# Import optionnel de numexpr (seuillage fusionné multi-thread)
+try:
+    import numexpr as ne
+    HAS_NUMEXPR = True
+except ImportError:
+    HAS_NUMEXPR = False
+
+# Import optionnel de Numba (noyau de seuillage compilé, si pas de numexpr)
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 logger = logging.getLogger(__name__)
 
 
+if HAS_NUMBA:
+
+    @njit(parallel=True, fastmath=True, boundscheck=False, cache=True)
+    def _threshold_kernel(flat, low, high, out):
+        """out[i] = low <= flat[i] <= high — une lecture par voxel."""
+        for i in prange(flat.size):
+            v = flat[i]
+            out[i] = v >= low and v <= high
+
+
+def threshold_mask(volume: np.ndarray, low: float, high: float) -> np.ndarray:
+    """
+    Masque bool de low <= volume <= high en une passe, sans temporaires.
+
+    Utilise numexpr si disponible, sinon un noyau Numba, sinon deux ufuncs
+    NumPy écrivant dans le même buffer préalloué.
+    """
+    if HAS_NUMEXPR:
+        return ne.evaluate("(volume >= low) & (volume <= high)")
+
+    if HAS_NUMBA:
+        flat = np.ascontiguousarray(volume).ravel()
+        out = np.empty(flat.size, dtype=bool)
+        _threshold_kernel(flat, float(low), float(high), out)
+        return out.reshape(volume.shape)
+
+    mask = np.empty(volume.shape, dtype=bool)
+    np.greater_equal(volume, low, out=mask)
+    mask &= np.less_equal(volume, high)
+    return mask
+
+
 class BoneSegmenter:
     """
     Segmente l'os dans un volume DICOM par seuillage Hounsfield.
@@ -46,59 +94,113 @@ class BoneSegmenter:
 
         if vmax > 10:
             # Volume en HU réels
-            mask = (volume >= self.hu_low) & (volume <= self.hu_high)
+            mask = threshold_mask(volume, self.hu_low, self.hu_high)
         else:
             # Volume normalisé [0,1] — on suppose une calibration standard CT
             norm_low = (self.hu_low + 1024) / 4024
             norm_high = min((self.hu_high + 1024) / 4024, 1.0)
-            mask = (volume >= norm_low) & (volume <= norm_high)
+            mask = threshold_mask(volume, norm_low, norm_high)
 
-        mask = mask.astype(bool)
-        ratio = mask.sum() / mask.size * 100
-        logger.info(f"Segmentation terminée: {mask.sum():,} voxels os ({ratio:.1f}%)")
+        n_bone = int(np.count_nonzero(mask))
+        ratio = n_bone / mask.size * 100
+        logger.info(f"Segmentation terminée: {n_bone:,} voxels os ({ratio:.1f}%)")
         return mask
 
     def segment_with_cleanup(
         self,
         volume: np.ndarray,
         min_size: int = 500,
+        label_stride: int = 1,
+        keep: str = "all",
+        mask: Optional[np.ndarray] = None,
     ) -> np.ndarray:
         """
         Segmentation + suppression des très petites composantes.
-        Conserve TOUTES les composantes >= min_size (plusieurs vertèbres).
+
+        keep="all"     : conserve TOUTES les composantes >= min_size (plusieurs vertèbres)
+        keep="largest" : conserve uniquement la plus grande composante
+
+        label_stride : réduction XY (blocs stride×stride) pour l'étiquetage
+        des composantes ; 1 (défaut) = pleine résolution, résultat identique
+        à un étiquetage voxel par voxel. >1 est plus rapide mais peut
+        fusionner des composantes voisines et changer celles qui atteignent
+        min_size. Les tailles restent comptées en voxels pleine résolution
+        et le masque final est toujours intersecté avec le masque original.
+
+        mask : masque os déjà seuillé (ex. VolumeBuilder.prepare) — évite un
+        second seuillage du volume ; il est modifié en place.
         """
-        mask = self.segment(volume)
+        if keep not in ("all", "largest"):
+            raise ValueError(f"keep inconnu: {keep}. Valides: ['all', 'largest']")
+
+        if mask is None:
+            mask = self.segment(volume)
 
         try:
             from scipy.ndimage import label, binary_fill_holes
 
-            # Remplir les trous slice par slice
-            for z in range(mask.shape[0]):
-                mask[z] = binary_fill_holes(mask[z])
-
-            # Garder TOUTES les composantes suffisamment grandes
-            labeled, num = label(mask)
+            # Remplir les trous slice par slice — coupes indépendantes,
+            # traitées en parallèle (scipy libère le GIL dans ses boucles C)
+            def _fill_slice(z: int):
+                if mask[z].any():
+                    mask[z] = binary_fill_holes(mask[z])
+
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                list(pool.map(_fill_slice, range(mask.shape[0])))
+
+            # Garder TOUTES les composantes suffisamment grandes.
+            stride = max(1, int(label_stride))
+            if stride == 1:
+                # Pleine résolution : étiquetage direct du masque, sans copie
+                labeled, num = label(mask)
+                counts = None
+            else:
+                # Grille XY réduite : un bloc est "os" s'il contient au moins
+                # un voxel os, et pèse son nombre de voxels
+                counts = _block_counts_xy(mask, stride)
+                labeled, num = label(counts > 0)
             if num > 1:
-                keep = np.zeros_like(mask, dtype=bool)
-                sizes = []
-                for i in range(1, num + 1):
-                    comp = labeled == i
-                    s = int(comp.sum())
-                    sizes.append(s)
-                    if s >= min_size:
-                        keep |= comp
-                n_kept = sum(1 for s in sizes if s >= min_size)
+                # Tailles de toutes les composantes en une passe, puis LUT label → garder
+                if counts is None:
+                    sizes = np.bincount(labeled.ravel(), minlength=num + 1)
+                else:
+                    sizes = np.bincount(
+                        labeled.ravel(), weights=counts.ravel(), minlength=num + 1
+                    ).astype(np.int64)
+                    del counts
+                sizes[0] = 0
+                if keep == "largest":
+                    keep_label = np.zeros_like(sizes, dtype=bool)
+                    keep_label[sizes.argmax()] = True
+                else:
+                    keep_label = sizes >= min_size
+                n_kept = int(keep_label.sum())
                 logger.info(
                     f"Cleanup: {num} composantes → {n_kept} conservées "
-                    f"(min_size={min_size}, sizes max={max(sizes):,})"
+                    f"(keep={keep}, min_size={min_size}, sizes max={int(sizes.max()):,})"
                 )
-                mask = keep
+                kept = keep_label[labeled]
+                if stride > 1:
+                    nz, ny, nx = mask.shape
+                    kept = np.repeat(np.repeat(kept, stride, axis=1), stride, axis=2)[:, :ny, :nx]
+                    kept &= mask
+                mask = kept
 
         except ImportError:
             logger.warning("scipy non disponible — cleanup ignoré")
 
-        return mask.astype(bool)
+        return mask.astype(bool, copy=False)
 
     def get_volume_fraction(self, mask: np.ndarray) -> float:
         """Retourne le pourcentage de voxels os."""
-        return float(mask.sum()) / mask.size * 100
+        return np.count_nonzero(mask) / mask.size * 100
+
+
+def _block_counts_xy(mask: np.ndarray, stride: int) -> np.ndarray:
+    """Nombre de voxels True par bloc stride×stride dans le plan XY (stride > 1)."""
+    nz, ny, nx = mask.shape
+    pad_y, pad_x = -ny % stride, -nx % stride
+    if pad_y or pad_x:
+        mask = np.pad(mask, ((0, 0), (0, pad_y), (0, pad_x)))
+    blocks = mask.reshape(nz, (ny + pad_y) // stride, stride, (nx + pad_x) // stride, stride)
+    return blocks.sum(axis=(2, 4), dtype=np.int32)
@@ -4,13 +4,73 @@ Utilise VolumeBuilder, BoneSegmenter et MeshGenerator (Marching Cubes).
 Aucun GPU requis.
 """
 
+import hashlib
+import json
 import logging
+import os
+import time
 import numpy as np
+from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 
+# Import optionnel de Numba (statistiques du volume en une passe)
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 logger = logging.getLogger(__name__)
 
 
+if HAS_NUMBA:
+
+    @njit(parallel=True, cache=True)
+    def _volume_stats_kernel(volume, bone_mask):
+        """min/max/somme HU et nombre de voxels os par coupe Z, en une lecture."""
+        nz, ny, nx = volume.shape
+        vmin = np.empty(nz, dtype=np.float64)
+        vmax = np.empty(nz, dtype=np.float64)
+        vsum = np.zeros(nz, dtype=np.float64)
+        count = np.zeros(nz, dtype=np.int64)
+        for z in prange(nz):
+            lo = np.inf
+            hi = -np.inf
+            s = 0.0
+            c = 0
+            for y in range(ny):
+                for x in range(nx):
+                    v = np.float64(volume[z, y, x])
+                    lo = min(lo, v)
+                    hi = max(hi, v)
+                    s += v
+                    if bone_mask[z, y, x]:
+                        c += 1
+            vmin[z] = lo
+            vmax[z] = hi
+            vsum[z] = s
+            count[z] = c
+        return vmin.min(), vmax.max(), vsum.sum(), count.sum()
+
+
+def volume_stats(volume: np.ndarray, bone_mask: np.ndarray) -> Tuple[float, float, float, int]:
+    """
+    Retourne (hu_min, hu_max, hu_mean, bone_voxels).
+
+    Noyau Numba parallèle par coupe Z si disponible (une lecture du volume),
+    sinon réductions NumPy sans tableau intermédiaire.
+    """
+    if HAS_NUMBA and volume.ndim == 3 and volume.size:
+        vmin, vmax, vsum, count = _volume_stats_kernel(
+            np.ascontiguousarray(volume), np.ascontiguousarray(bone_mask)
+        )
+    else:
+        vmin, vmax = volume.min(), volume.max()
+        vsum = np.sum(volume, dtype=np.float64)
+        count = np.count_nonzero(bone_mask)
+    return float(vmin), float(vmax), float(vsum) / max(volume.size, 1), int(count)
+
+
 class SpineReconstructor:
     """
     Orchestrateur du pipeline de reconstruction 3D du rachis.
@@ -30,6 +90,9 @@ class SpineReconstructor:
         step_size: int = 2,
         decimate_ratio: float = 0.3,
         smooth_iterations: int = 20,
+        cache_dir: Optional[str] = None,
+        cache_max_mb: Optional[float] = None,
+        label_stride: int = 1,
     ):
         """
         Args:
@@ -37,12 +100,20 @@ class SpineReconstructor:
             step_size         : sous-échantillonnage Marching Cubes (1=fin, 2=rapide)
             decimate_ratio    : fraction de faces supprimées lors de la décimation
             smooth_iterations : lissage du maillage final
+            cache_dir         : dossier du cache .npy des volumes DICOM (None = désactivé)
+            cache_max_mb      : taille maximale du cache ; au-delà, les volumes les
+                                moins récemment utilisés sont supprimés (None = illimité)
+            label_stride      : réduction XY de l'étiquetage des composantes os
+                                (1 = exact ; >1 plus rapide mais approché)
         """
         self.hu_low = hu_low
         self.hu_high = hu_high
         self.step_size = step_size
         self.decimate_ratio = decimate_ratio
         self.smooth_iterations = smooth_iterations
+        self.cache_dir = cache_dir
+        self.cache_max_mb = cache_max_mb
+        self.label_stride = label_stride
         self.is_initialized = True
 
         # Instanciation lazy des modules
@@ -82,12 +153,8 @@ class SpineReconstructor:
 
         _progress(0, "Chargement des fichiers DICOM...")
 
-        # 1. Chargement DICOM
-        from app.data.dicom_loader import DICOMManager
-        manager = DICOMManager()
-        patient_data = manager.load_folder(dicom_folder)
-        volume = manager.get_volume_array()
-        spacing = getattr(patient_data, 'spacing', (1.0, 1.0, 1.0))
+        # 1. Chargement DICOM (ou volume déjà en cache)
+        volume, spacing = self._load_dicom_volume(dicom_folder)
 
         logger.info(f"Volume chargé : {volume.shape}, spacing={spacing}")
         _progress(20, "Volume DICOM chargé")
@@ -95,15 +162,17 @@ class SpineReconstructor:
         # 2. Construction du volume (normalisation + lissage)
         _progress(25, "Normalisation et préparation du volume...")
         builder = self._get_volume_builder()
-        volume_f, bone_mask_builder = builder.prepare(
+        volume_f, bone_mask = builder.prepare(
             volume, spacing=spacing, smooth=True
         )
         _progress(40, "Volume préparé")
 
-        # 3. Segmentation os (seuillage HU)
+        # 3. Segmentation os : nettoyage du masque déjà seuillé par le builder
         _progress(45, "Segmentation osseuse...")
         segmenter = self._get_segmenter()
-        bone_mask = segmenter.segment_with_cleanup(volume)
+        bone_mask = segmenter.segment_with_cleanup(
+            volume, mask=bone_mask, label_stride=self.label_stride
+        )
         bone_fraction = segmenter.get_volume_fraction(bone_mask)
         _progress(60, f"Segmentation : {bone_fraction:.1f}% de voxels os")
 
@@ -142,12 +211,14 @@ class SpineReconstructor:
 
         _progress(0, "Préparation du volume...")
         builder = self._get_volume_builder()
-        volume_f, _ = builder.prepare(volume, spacing=spacing, smooth=True)
+        volume_f, bone_mask = builder.prepare(volume, spacing=spacing, smooth=True)
         _progress(30, "Volume préparé")
 
         _progress(35, "Segmentation osseuse...")
         segmenter = self._get_segmenter()
-        bone_mask = segmenter.segment_with_cleanup(volume)
+        bone_mask = segmenter.segment_with_cleanup(
+            volume, mask=bone_mask, label_stride=self.label_stride
+        )
         _progress(60, "Segmentation terminée")
 
         _progress(65, "Marching Cubes...")
@@ -170,6 +241,106 @@ class SpineReconstructor:
     # Privé
     # ------------------------------------------------------------------
 
+    def _load_dicom_volume(self, dicom_folder: str) -> Tuple[np.ndarray, tuple]:
+        """
+        Retourne (volume, spacing) du dossier DICOM.
+
+        Si cache_dir est défini, le volume est enregistré en .npy à la première
+        lecture puis rouvert en mémoire mappée (lecture seule) tant que le
+        contenu du dossier (chemins, tailles, dates) n'a pas changé.
+        Le .npy est écrit dans un fichier temporaire puis renommé, et le .json
+        seulement ensuite : un lecteur concurrent ne voit jamais un fichier partiel.
+        """
+        cache_file = None
+        if self.cache_dir:
+            cache_file = Path(self.cache_dir) / f"{self._folder_cache_key(dicom_folder)}.npy"
+            meta_file = cache_file.with_suffix(".json")
+            if cache_file.exists() and meta_file.exists():
+                try:
+                    volume = np.load(cache_file, mmap_mode='r')
+                    spacing = tuple(json.loads(meta_file.read_text())['spacing'])
+                    # atime = dernière utilisation, pour l'éviction LRU
+                    # (indépendamment des options de montage noatime/relatime)
+                    os.utime(cache_file, (time.time(), cache_file.stat().st_mtime))
+                    logger.info(f"Volume DICOM lu depuis le cache {cache_file}")
+                    return volume, spacing
+                except Exception as e:
+                    logger.warning(f"Cache volume illisible ({e}) — relecture DICOM")
+
+        from app.data.dicom_loader import DICOMManager
+        manager = DICOMManager()
+        patient_data = manager.load_folder(dicom_folder)
+        # Manager temporaire : les pixels de chaque slice sont libérés après copie
+        volume = manager.get_volume_array(release_pixels=True)
+        spacing = tuple(getattr(patient_data, 'spacing', (1.0, 1.0, 1.0)))
+
+        if cache_file is not None:
+            self._write_cache(cache_file, volume, spacing)
+        return volume, spacing
+
+    def _write_cache(self, cache_file: Path, volume: np.ndarray, spacing: tuple):
+        """Écriture atomique (.npy puis .json) suivie de l'éviction du cache."""
+        key = cache_file.stem
+        tmp_npy = cache_file.with_name(f"{key}.{os.getpid()}.tmp.npy")
+        tmp_json = cache_file.with_name(f"{key}.{os.getpid()}.tmp.json")
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            np.save(tmp_npy, volume)
+            os.replace(tmp_npy, cache_file)
+            tmp_json.write_text(json.dumps({'spacing': spacing}))
+            os.replace(tmp_json, cache_file.with_suffix(".json"))
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire le cache volume : {e}")
+            for tmp in (tmp_npy, tmp_json):
+                tmp.unlink(missing_ok=True)
+            return
+        self._prune_cache(keep=cache_file)
+
+    def _prune_cache(self, keep: Optional[Path] = None):
+        """Supprimer les volumes les moins récemment utilisés au-delà de cache_max_mb."""
+        if not self.cache_max_mb:
+            return
+        limit = self.cache_max_mb * 1024 * 1024
+        entries = []
+        for npy in Path(self.cache_dir).glob("*.npy"):
+            if npy.name.endswith(".tmp.npy"):
+                continue
+            try:
+                st = npy.stat()
+            except OSError:
+                continue
+            entries.append((st.st_atime, st.st_size, npy))
+        total = sum(size for _, size, _ in entries)
+        for _, size, npy in sorted(entries, key=lambda e: e[0]):
+            if total <= limit:
+                break
+            if npy == keep:
+                continue
+            try:
+                npy.unlink()
+                npy.with_suffix(".json").unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Éviction du cache volume impossible ({npy}) : {e}")
+                continue
+            total -= size
+            logger.info(f"Volume retiré du cache : {npy.name}")
+
+    @staticmethod
+    def _folder_cache_key(dicom_folder: str) -> str:
+        """Empreinte du dossier : chemins relatifs, tailles et dates de modification."""
+        digest = hashlib.sha1(os.path.abspath(dicom_folder).encode())
+        for root, dirs, files in os.walk(dicom_folder):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                rel = os.path.relpath(path, dicom_folder)
+                digest.update(f"{rel}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
     def _get_volume_builder(self):
         if self._volume_builder is None:
             from app.ai.reconstruction.volume_builder import VolumeBuilder
@@ -210,14 +381,15 @@ class SpineReconstructor:
 
     def _compute_stats(self, volume, bone_mask, mesh) -> Dict[str, Any]:
         """Calcule des statistiques de base sur le volume et le maillage."""
+        hu_min, hu_max, hu_mean, bone_voxels = volume_stats(volume, bone_mask)
         stats = {
             'volume_shape': volume.shape,
-            'bone_voxels': int(bone_mask.sum()),
+            'bone_voxels': bone_voxels,
             'total_voxels': int(bone_mask.size),
-            'bone_fraction_pct': float(bone_mask.sum() / bone_mask.size * 100),
-            'hu_min': float(volume.min()),
-            'hu_max': float(volume.max()),
-            'hu_mean': float(volume.mean()),
+            'bone_fraction_pct': float(bone_voxels / bone_mask.size * 100),
+            'hu_min': hu_min,
+            'hu_max': hu_max,
+            'hu_mean': hu_mean,
         }
 
         if mesh is not None:
@@ -7,6 +7,15 @@ import numpy as np
 import logging
 from typing import Tuple, Optional
 
+from app.ai.reconstruction.segmentation import threshold_mask
+
+# Import optionnel de numexpr (normalisation fusionnée multi-thread)
+try:
+    import numexpr as ne
+    HAS_NUMEXPR = True
+except ImportError:
+    HAS_NUMEXPR = False
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,6 +33,9 @@ class VolumeBuilder:
     HU_BONE_LOW: int = 200     # seuil bas (os spongieux inclus)
     HU_BONE_HIGH: int = 1900   # seuil haut (os cortical dense)
 
+    # Profondeur (coupes Z) des blocs envoyés au GPU pour le lissage
+    GPU_CHUNK_DEPTH: int = 64
+
     def __init__(
         self,
         hu_low: int = HU_BONE_LOW,
@@ -56,29 +68,48 @@ class VolumeBuilder:
             volume_float32  : volume normalisé [0, 1]
             bone_mask       : masque binaire (bool) de l'os
         """
+        # min/max lus une seule fois, partagés par la normalisation et le masque
+        vrange = (float(volume.min()), float(volume.max()))
         logger.info(f"Volume shape={volume.shape}, dtype={volume.dtype}, "
-                    f"range=[{volume.min()}, {volume.max()}]")
+                    f"range=[{vrange[0]}, {vrange[1]}]")
 
         # 1. Cast + normalisation
-        volume_f = self.normalize(volume)
+        volume_f = self.normalize(volume, vrange=vrange)
 
         # 2. Masque os (avant normalisation, sur les HU réels si disponibles)
-        bone_mask = self.compute_bone_mask(volume)
+        bone_mask = self.compute_bone_mask(volume, vrange=vrange)
 
         # 3. Lissage
         if smooth:
             volume_f = self.apply_gaussian_smooth(volume_f, sigma=self.gaussian_sigma)
 
-        logger.info(f"Préparation terminée — bone voxels: {bone_mask.sum():,} / {bone_mask.size:,}")
+        logger.info(f"Préparation terminée — bone voxels: {np.count_nonzero(bone_mask):,} / {bone_mask.size:,}")
         return volume_f, bone_mask
 
-    def normalize(self, volume: np.ndarray) -> np.ndarray:
-        """Normalise le volume en float32 dans [0, 1]."""
-        v = volume.astype(np.float32)
-        vmin, vmax = float(v.min()), float(v.max())
+    def normalize(
+        self,
+        volume: np.ndarray,
+        vrange: Optional[Tuple[float, float]] = None,
+    ) -> np.ndarray:
+        """
+        Normalise le volume en float32 dans [0, 1].
+
+        Une seule écriture : min/max sur le volume d'origine (ou vrange si
+        déjà connu), puis (v - vmin) * scale évalué dans le buffer float32.
+        """
+        vmin, vmax = vrange if vrange is not None else (float(volume.min()), float(volume.max()))
         if vmax - vmin < 1e-6:
-            return np.zeros_like(v)
-        return (v - vmin) / (vmax - vmin)
+            return np.zeros(volume.shape, dtype=np.float32)
+        scale = 1.0 / (vmax - vmin)
+
+        out = np.empty(volume.shape, dtype=np.float32)
+        if HAS_NUMEXPR:
+            ne.evaluate("(volume - vmin) * scale", out=out, casting="unsafe")
+        else:
+            np.copyto(out, volume, casting="unsafe")
+            out -= vmin
+            out *= scale
+        return out
 
     def apply_hu_window(
         self,
@@ -92,32 +123,86 @@ class VolumeBuilder:
         """
         low = low if low is not None else self.hu_low
         high = high if high is not None else self.hu_high
-        clipped = np.clip(volume.astype(np.float32), low, high)
-        return (clipped - low) / (high - low)
+        out = volume.astype(np.float32)
+        np.clip(out, low, high, out=out)
+        out -= low
+        out *= 1.0 / (high - low)
+        return out
 
-    def compute_bone_mask(self, volume: np.ndarray) -> np.ndarray:
+    def compute_bone_mask(
+        self,
+        volume: np.ndarray,
+        vrange: Optional[Tuple[float, float]] = None,
+    ) -> np.ndarray:
         """
         Segmentation os par seuillage HU.
         Fonctionne que le volume soit en HU réels ou déjà normalisé [0,1].
         """
-        vmin, vmax = float(volume.min()), float(volume.max())
+        vmin, vmax = vrange if vrange is not None else (float(volume.min()), float(volume.max()))
 
         if vmax > 10:
             # Valeurs HU réelles (typiquement -1024 à 3000)
-            mask = (volume >= self.hu_low) & (volume <= self.hu_high)
-        else:
-            # Volume déjà normalisé → estimation proportionnelle
-            norm_low = (self.hu_low + 1024) / 4024
-            norm_high = min((self.hu_high + 1024) / 4024, 1.0)
-            mask = (volume >= norm_low) & (volume <= norm_high)
+            return threshold_mask(volume, self.hu_low, self.hu_high)
 
-        return mask.astype(bool)
+        # Volume déjà normalisé → estimation proportionnelle
+        norm_low = (self.hu_low + 1024) / 4024
+        norm_high = min((self.hu_high + 1024) / 4024, 1.0)
+        return threshold_mask(volume, norm_low, norm_high)
 
     def apply_gaussian_smooth(self, volume: np.ndarray, sigma: float = 1.0) -> np.ndarray:
-        """Applique un filtre gaussien pour réduire le bruit."""
+        """
+        Applique un filtre gaussien pour réduire le bruit.
+
+        Sur GPU (CuPy disponible) : cupyx.scipy.ndimage, même sémantique que
+        SciPy. Sur CPU : trois passes gaussian_filter1d enchaînées dans un
+        seul buffer float32 préalloué (pas de copie si déjà float32).
+        """
+        vol = volume.astype(np.float32, copy=False)
+
+        smoothed = self._gaussian_smooth_gpu(vol, sigma)
+        if smoothed is not None:
+            return smoothed
+
         try:
-            from scipy.ndimage import gaussian_filter
-            return gaussian_filter(volume.astype(np.float32), sigma=sigma)
+            from scipy.ndimage import gaussian_filter1d
         except ImportError:
             logger.warning("scipy non disponible — lissage ignoré")
-            return volume.astype(np.float32)
+            return vol
+
+        out = np.empty_like(vol)
+        src = vol
+        for axis in range(vol.ndim):
+            gaussian_filter1d(src, sigma=sigma, axis=axis, output=out)
+            src = out
+        return out
+
+    def _gaussian_smooth_gpu(self, vol: np.ndarray, sigma: float) -> Optional[np.ndarray]:
+        """
+        Lissage gaussien via CuPy, ou None si aucun GPU CUDA n'est disponible.
+
+        Le volume est traité par blocs de GPU_CHUNK_DEPTH coupes Z avec un
+        recouvrement égal au rayon du noyau : le résultat est identique au
+        filtrage global, mais la VRAM ne contient qu'un bloc à la fois.
+        """
+        try:
+            import cupy
+            from cupyx.scipy.ndimage import gaussian_filter as gaussian_filter_gpu
+            if cupy.cuda.runtime.getDeviceCount() == 0:
+                return None
+        except Exception:
+            return None
+
+        # Rayon du noyau gaussien (truncate=4.0 par défaut, comme SciPy)
+        halo = int(4.0 * sigma + 0.5)
+        depth = vol.shape[0]
+        out = np.empty_like(vol)
+        try:
+            for z0 in range(0, depth, self.GPU_CHUNK_DEPTH):
+                z1 = min(z0 + self.GPU_CHUNK_DEPTH, depth)
+                lo, hi = max(z0 - halo, 0), min(z1 + halo, depth)
+                block = gaussian_filter_gpu(cupy.asarray(vol[lo:hi]), sigma=sigma)
+                out[z0:z1] = cupy.asnumpy(block[z0 - lo:z1 - lo])
+            return out
+        except Exception as e:
+            logger.warning(f"Lissage GPU impossible ({e}) — repli CPU")
+            return None
@@ -1,11 +1,33 @@
 
 import logging
+from collections import Counter, namedtuple
 from typing import Dict, Any, List, Optional
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
+# Vertèbres en colonnes (structure de tableaux) : un tableau NumPy par champ
+VertebraeSoA = namedtuple('VertebraeSoA', 'heights compressions statuses centroids labels')
+
+
+def vertebrae_to_soa(vertebrae: List[Dict[str, Any]]) -> VertebraeSoA:
+    """Convertit la liste de dicts de VertebraDetector en tableaux, en un seul parcours."""
+    n = len(vertebrae)
+    heights = np.empty(n, dtype=np.float64)
+    compressions = np.empty(n, dtype=np.float64)
+    centroids = np.empty((n, 3), dtype=np.float64)
+    statuses, labels = [], []
+    for i, v in enumerate(vertebrae):
+        heights[i] = v["height_mm"]
+        compressions[i] = v["compression_ratio"]
+        centroids[i] = v["centroid_px"]
+        statuses.append(v.get("ml_status", v.get("status", "normal")))
+        labels.append(v.get("label", "?"))
+    return VertebraeSoA(heights, compressions, np.array(statuses, dtype=object),
+                        centroids, labels)
+
+
 class QuantitativeAnalyzer:
     """Analyseur quantitatif — métriques rachidiennes réelles."""
 
@@ -22,9 +44,10 @@ class QuantitativeAnalyzer:
         voxel_vol_mm3 = dz * dy * dx
         metrics: Dict[str, Any] = {}
 
+        n_bone = int(np.count_nonzero(bone_mask)) if bone_mask is not None else 0
+
         # Volume osseux
-        if bone_mask is not None and bone_mask.any():
-            n_bone = int(bone_mask.sum())
+        if n_bone:
             metrics["bone_volume_cm3"]  = round(n_bone * voxel_vol_mm3 / 1000, 2)
             metrics["bone_voxel_count"] = n_bone
         elif mesh is not None:
@@ -34,37 +57,36 @@ class QuantitativeAnalyzer:
                 pass
 
         # Densité HU
-        if volume is not None and bone_mask is not None and bone_mask.any():
-            hu_vals = volume[bone_mask]
-            metrics["hu_mean"]   = round(float(hu_vals.mean()), 1)
-            metrics["hu_std"]    = round(float(hu_vals.std()),  1)
-            metrics["hu_min"]    = round(float(hu_vals.min()),  1)
-            metrics["hu_max"]    = round(float(hu_vals.max()),  1)
+        if volume is not None and n_bone:
+            hu_mean, hu_std, hu_min, hu_max = self._masked_hu_stats(volume, bone_mask, n_bone)
+            metrics["hu_mean"]   = round(hu_mean, 1)
+            metrics["hu_std"]    = round(hu_std,  1)
+            metrics["hu_min"]    = round(hu_min,  1)
+            metrics["hu_max"]    = round(hu_max,  1)
             metrics["bone_density_index"] = round(
-                float(np.clip((hu_vals.mean() - 200) / 1400, 0, 1)), 3
+                float(np.clip((hu_mean - 200) / 1400, 0, 1)), 3
             )
 
         # Métriques vertèbres
         if vertebrae:
-            h_list   = [v["height_mm"]         for v in vertebrae]
-            comp_list = [v["compression_ratio"]  for v in vertebrae]
+            soa = vertebrae_to_soa(vertebrae)
 
-            metrics["vertebrae_count"]         = len(vertebrae)
-            metrics["mean_vertebra_height_mm"] = round(float(np.mean(h_list)), 1)
-            metrics["min_vertebra_height_mm"]  = round(float(np.min(h_list)),  1)
-            metrics["mean_compression_ratio"]  = round(float(np.mean(comp_list)), 3)
-            metrics["min_compression_ratio"]   = round(float(np.min(comp_list)), 3)
+            metrics["vertebrae_count"]         = len(soa.labels)
+            metrics["mean_vertebra_height_mm"] = round(float(soa.heights.mean()), 1)
+            metrics["min_vertebra_height_mm"]  = round(float(soa.heights.min()),  1)
+            metrics["mean_compression_ratio"]  = round(float(soa.compressions.mean()), 3)
+            metrics["min_compression_ratio"]   = round(float(soa.compressions.min()), 3)
 
-            statuses = [v.get("ml_status", v.get("status", "normal")) for v in vertebrae]
+            status_counts = Counter(soa.statuses)
             for s in ["normal", "ostéopénique", "suspect", "comprimée"]:
                 key = s.replace("é","e").replace("è","e")
-                metrics[f"count_{key}"] = statuses.count(s)
+                metrics[f"count_{key}"] = status_counts.get(s, 0)
 
-            metrics["estimated_cobb_angle_deg"] = round(self._estimate_cobb(vertebrae), 1)
+            metrics["estimated_cobb_angle_deg"] = round(self._estimate_cobb(soa), 1)
 
-            worst = int(np.argmin(comp_list))
-            metrics["most_compressed_vertebra"] = vertebrae[worst].get("label", "?")
-            metrics["most_compressed_ratio"]    = round(comp_list[worst], 3)
+            worst = int(np.argmin(soa.compressions))
+            metrics["most_compressed_vertebra"] = soa.labels[worst]
+            metrics["most_compressed_ratio"]    = round(float(soa.compressions[worst]), 3)
 
         if anomalies:
             metrics["total_anomalies"] = len(anomalies)
@@ -72,17 +94,42 @@ class QuantitativeAnalyzer:
         logger.info(f"Analyse quantitative : {len(metrics)} métriques calculées")
         return metrics
 
-    def _estimate_cobb(self, vertebrae: List[Dict[str, Any]]) -> float:
-        if len(vertebrae) < 3:
+    # Nombre de coupes Z traitées à la fois pour les statistiques HU
+    HU_SLAB_DEPTH: int = 16
+
+    def _masked_hu_stats(self, volume: np.ndarray, bone_mask: np.ndarray, n_bone: int):
+        """
+        (moyenne, écart-type, min, max) des HU sous le masque.
+
+        Parcours par tranches Z : volume[bone_mask] n'est jamais matérialisé
+        en entier, seule une tranche de voxels os est extraite à la fois.
+        """
+        total = total_sq = 0.0
+        hu_min, hu_max = np.inf, -np.inf
+        for z0 in range(0, volume.shape[0], self.HU_SLAB_DEPTH):
+            vals = volume[z0:z0 + self.HU_SLAB_DEPTH][bone_mask[z0:z0 + self.HU_SLAB_DEPTH]]
+            if vals.size == 0:
+                continue
+            vals = vals.astype(np.float64, copy=False)
+            total += float(vals.sum())
+            total_sq += float(np.dot(vals, vals))
+            hu_min = min(hu_min, float(vals.min()))
+            hu_max = max(hu_max, float(vals.max()))
+        mean = total / n_bone
+        std = float(np.sqrt(max(total_sq / n_bone - mean * mean, 0.0)))
+        return mean, std, hu_min, hu_max
+
+    def _estimate_cobb(self, soa: VertebraeSoA) -> float:
+        if len(soa.centroids) < 3:
             return 0.0
         try:
-            centroids = np.array([v["centroid_px"] for v in vertebrae])
-            z = centroids[:, 0]
-            x = centroids[:, 2]
-            if z.ptp() < 1:
+            z = soa.centroids[:, 0]
+            x = soa.centroids[:, 2]
+            z_span = np.ptp(z)
+            if z_span < 1:
                 return 0.0
             coeffs = np.polyfit(z, x, 1)
             res = x - np.polyval(coeffs, z)
-            return float(np.degrees(np.arctan2(res.ptp(), z.ptp())))
+            return float(np.degrees(np.arctan2(np.ptp(res), z_span)))
         except Exception:
             return 0.0
@@ -4,7 +4,6 @@ import logging
 from PySide6.QtWidgets import QApplication
 
 from app.core.config import Config
-from app.ui.main_window import MainWindow
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +30,10 @@ class SpineAnalyzerApp(QApplication):
     def _init_ui(self):
         """Initialiser l'interface utilisateur"""
         try:
+            # Import différé : la QApplication existe déjà quand les modules
+            # UI/IA (VTK, scikit-image...) sont chargés
+            from app.ui.main_window import MainWindow
+
             # Créer la fenêtre principale
             self.window = MainWindow()
             
@@ -1,27 +1,97 @@
 
+import logging
 import os
+import pickle
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Dict
 import yaml
-from dotenv import load_dotenv
 
-# Charger les variables d'environnement
-load_dotenv()
+# Parseur libyaml (C) si disponible, sinon SafeLoader pur Python
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+logger = logging.getLogger(__name__)
+
+
+def _flatten(d: Dict, prefix: str = ''):
+    """Produit ('a/b/c', valeur) pour chaque nœud, sous-dictionnaires compris."""
+    for k, v in d.items():
+        path = f"{prefix}{k}"
+        yield path, v
+        if isinstance(v, dict):
+            yield from _flatten(v, path + '/')
+
+
+def _find_env_file(start: Path) -> Any:
+    """Premier fichier .env trouvé en remontant depuis start (comme find_dotenv)."""
+    for directory in (start, *start.parents):
+        candidate = directory / '.env'
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _load_env(path: Any = None):
+    """
+    Charger un fichier .env dans os.environ, sans dépendance à python-dotenv.
+
+    Format supporté : lignes CLE=valeur, préfixe 'export' optionnel,
+    commentaires '#' et guillemets autour de la valeur. Les variables déjà
+    définies dans l'environnement ne sont pas écrasées.
+    """
+    path = path or _find_env_file(Path(__file__).resolve().parent)
+    if path is None:
+        return
+    try:
+        lines = Path(path).read_text(encoding='utf-8').splitlines()
+    except OSError:
+        return
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#') or '=' not in line:
+            continue
+        if line.startswith('export '):
+            line = line[len('export '):]
+        key, value = line.split('=', 1)
+        value = value.strip()
+        if value[:1] in ('"', "'") and value[-1:] == value[:1] and len(value) > 1:
+            value = value[1:-1]
+        elif ' #' in value:
+            value = value.split(' #', 1)[0].rstrip()
+        os.environ.setdefault(key.strip(), value)
 
 class Config:
     """Gestionnaire de configuration de l'application"""
     
     _instance = None
     _config = {}
+    _flat = {}      # vue à plat 'a/b/c' → valeur, servie par get()
+    _dirty = {}     # clés modifiées depuis la dernière sauvegarde
+    _batch_depth = 0
+    _version = 0    # incrémenté à chaque modification (set/update)
+    _loaded = False
     
     def __new__(cls):
         if cls._instance is None:
+            # Chargement différé au premier accès (get/set/paths)
             cls._instance = super(Config, cls).__new__(cls)
-            cls._instance._load_config()
         return cls._instance
+
+    def _ensure_loaded(self):
+        """Construire la configuration au premier accès uniquement."""
+        if not self._loaded:
+            self._load_config()
+            self._flat = dict(_flatten(self._config))
+            self._loaded = True
     
     def _load_config(self):
         """Charger la configuration depuis les fichiers et l'environnement"""
+        # Variables du fichier .env (lu une seule fois, au premier accès)
+        _load_env()
+
         # Configuration par défaut
         self._config = {
             'app': {
@@ -50,29 +120,72 @@ class Config:
             'ai': {
                 'reconstruction': {
                     'model_path': 'reconstruction/model.pth',
+                    # Étiquetage des composantes os sur blocs XY (>1 : approché, opt-in)
+                    'label_stride': 1,
                     'device': 'cuda' if os.getenv('USE_GPU', 'True').lower() == 'true' else 'cpu'
                 },
                 'detection': {
                     'model_path': 'detection/yolov8n.pt',
-                    'confidence_threshold': 0.5
+                    # Sous-échantillonnage XY du profil osseux Z (>1 : approché, opt-in)
+                    'profile_stride': 1,
+                    'confidence_threshold': 0.5,
+                    'use_tensorrt': os.getenv('USE_TENSORRT', 'False').lower() == 'true',
+                    'use_int8': False,
+                    'calibration_data': None,
+                    'num_workers': int(os.getenv('DETECTION_WORKERS', '1'))
                 }
             },
             'dicom': {
                 'auto_anonymize': True,
+                'volume_cache_dir': os.getenv('VOLUME_CACHE_DIR', str(Path(__file__).parent.parent.parent / 'temp' / 'volume_cache')),
+                'volume_cache_max_mb': int(os.getenv('VOLUME_CACHE_MAX_MB', '2048')),
                 'series_description_filter': ['spine', 'rachis', 'vertebra']
             }
         }
         
         # Charger fichier de config utilisateur si existant
-        config_path = Path(self._config['paths']['base_dir']) / 'config.yaml'
+        config_path = self._user_config_path()
         if config_path.exists():
             try:
-                with open(config_path, 'r') as f:
-                    user_config = yaml.safe_load(f)
-                    if user_config:
-                        self._merge_config(self._config, user_config)
+                user_config = self._read_user_config(config_path)
+                if user_config:
+                    self._merge_config(self._config, user_config)
             except Exception as e:
-                print(f"Erreur lors du chargement de la configuration: {e}")
+                logger.error(f"Erreur lors du chargement de la configuration: {e}")
+
+    def _user_config_path(self) -> Path:
+        return Path(self._config['paths']['base_dir']) / 'config.yaml'
+
+    def _read_user_config(self, config_path: Path) -> Any:
+        """
+        Lire config.yaml, via un cache pickle voisin tant que le fichier n'a pas changé.
+
+        Seul le contenu YAML est mis en cache (clé : mtime + taille), pas la
+        configuration fusionnée qui dépend aussi de l'environnement.
+        """
+        st = config_path.stat()
+        key = (st.st_mtime_ns, st.st_size)
+        cache_path = config_path.with_name(config_path.name + '.cache.pkl')
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_key, cached = pickle.load(f)
+            if cached_key == key:
+                return cached
+        except Exception:
+            pass
+
+        # Lecture en octets : libyaml décode lui-même le flux
+        with open(config_path, 'rb') as f:
+            user_config = yaml.load(f, Loader=_YamlLoader)
+
+        try:
+            tmp_path = cache_path.with_name(cache_path.name + f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((key, user_config), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+        return user_config
 
     def _merge_config(self, base: Dict, update: Dict):
         """Fusionner récursivement les dictionnaires de configuration"""
@@ -84,25 +197,102 @@ class Config:
 
     def get(self, key: str, default: Any = None) -> Any:
         """Récupérer une valeur de configuration (ex: 'ui/theme')"""
-        keys = key.split('/')
-        value = self._config
-        try:
-            for k in keys:
-                value = value[k]
-            return value
-        except (KeyError, TypeError):
-            return default
+        self._ensure_loaded()
+        return self._flat.get(key, default)
+
+    @property
+    def version(self) -> int:
+        """Compteur de modifications : permet de savoir si une copie est périmée"""
+        return self._version
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copie à plat de toute la configuration ('a/b/c' → valeur)"""
+        self._ensure_loaded()
+        return dict(self._flat)
 
     def set(self, key: str, value: Any):
-        """Définir une valeur de configuration"""
+        """Définir une valeur de configuration (en mémoire, voir save())"""
+        self._ensure_loaded()
+        self._assign(self._config, key, value)
+        self._dirty[key] = value
+        self._flat = dict(_flatten(self._config))
+        self._version += 1
+
+    def update(self, values: Dict[str, Any]):
+        """Définir plusieurs valeurs ('a/b' → valeur), vue à plat reconstruite une fois"""
+        self._ensure_loaded()
+        for key, value in values.items():
+            self._assign(self._config, key, value)
+        self._dirty.update(values)
+        self._flat = dict(_flatten(self._config))
+        self._version += 1
+
+    @staticmethod
+    def _assign(target: Dict, key: str, value: Any):
         keys = key.split('/')
-        target = self._config
         for k in keys[:-1]:
-            target = target.setdefault(k, {})
+            if not isinstance(target.get(k), dict):
+                target[k] = {}
+            target = target[k]
         target[keys[-1]] = value
-        
-        # Sauvegarder (optionnel, à implémenter si besoin de persistance immédiate)
+
+    @contextmanager
+    def batch(self):
+        """
+        Regrouper plusieurs set()/update() : une seule sauvegarde en sortie de bloc.
+
+        Les blocs peuvent être imbriqués ; seul le plus externe sauvegarde, et
+        uniquement s'il se termine sans exception.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.save()
+
+    def save(self):
+        """
+        Écrire dans config.yaml les valeurs modifiées depuis la dernière sauvegarde.
+
+        Elles sont fusionnées avec le contenu existant du fichier : les valeurs
+        par défaut et celles issues de l'environnement n'y sont pas recopiées.
+
+        Raises:
+            OSError: lecture de config.yaml ou écriture impossible (ex. fichier
+                     corrompu, dossier d'installation en lecture seule) ; les
+                     valeurs restent à sauvegarder au prochain appel.
+        """
+        self._ensure_loaded()
+        if not self._dirty:
+            return
+        config_path = self._user_config_path()
+        user_config = {}
+        if config_path.exists():
+            try:
+                user_config = self._read_user_config(config_path) or {}
+            except Exception as e:
+                # Ne pas écraser un fichier illisible : l'appelant doit le savoir
+                logger.error(f"config.yaml illisible, sauvegarde annulée: {e}")
+                raise OSError(f"config.yaml illisible: {e}") from e
+        for key, value in self._dirty.items():
+            self._assign(user_config, key, value)
+
+        tmp_path = config_path.with_name(config_path.name + f'.{os.getpid()}.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                yaml.safe_dump(user_config, f, allow_unicode=True, sort_keys=False)
+            os.replace(tmp_path, config_path)
+        except OSError:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            raise
+        self._dirty = {}
 
     @property
     def paths(self) -> Dict[str, str]:
+        self._ensure_loaded()
         return self._config['paths']
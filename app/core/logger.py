@@ -2,13 +2,19 @@
 Module de configuration du logging pour SpineAnalyzer Pro
 """
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+# Thread d'écriture des logs (console + fichier), arrêté à la sortie
+_listener: Optional[logging.handlers.QueueListener] = None
+
 
 def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None) -> None:
     """
@@ -31,20 +37,38 @@ def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None) -> No
     # Configuration du niveau de log
     level = getattr(logging, log_level.upper(), logging.INFO)
     
-    # Configuration des handlers
+    # Handlers réels (console + fichier, ouvert au premier enregistrement),
+    # alimentés par un thread dédié : les appels logger.* ne font que
+    # déposer l'enregistrement dans une file, sans E/S bloquante
+    formatter = logging.Formatter(log_format, datefmt=date_format)
     handlers = [
         # Handler pour la console
         logging.StreamHandler(sys.stdout),
         # Handler pour le fichier
-        logging.FileHandler(log_file, encoding='utf-8')
+        logging.FileHandler(log_file, encoding='utf-8', delay=True)
     ]
-    
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    log_queue = queue.Queue(-1)
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+
+    # Le QueueHandler transmet le message brut : la mise en forme complète
+    # est faite par les handlers du listener
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
     # Configuration de base du logging
     logging.basicConfig(
         level=level,
-        format=log_format,
-        datefmt=date_format,
-        handlers=handlers
+        handlers=[queue_handler],
+        force=True,
     )
     
     # Logger pour l'application
@@ -52,6 +76,17 @@ def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None) -> No
     logger.info(f"Logging configuré - Niveau: {log_level}, Fichier: {log_file}")
 
 
+def shutdown_logging() -> None:
+    """Vider la file de logs et arrêter le thread d'écriture."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Récupère un logger pour un module spécifique
@@ -1,6 +1,8 @@
 
 import os
+import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 import pydicom
@@ -8,7 +10,68 @@ import numpy as np
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# SOP Class UID (préfixes) des objets DICOM sans image : écartés sur la seule
+# lecture de l'en-tête fichier (groupe 0002), sans analyser le dataset
+NON_IMAGE_SOP_CLASSES = (
+    '1.2.840.10008.1.3.10',             # DICOMDIR
+    '1.2.840.10008.5.1.4.1.1.9.',       # Waveforms (ECG, audio...)
+    '1.2.840.10008.5.1.4.1.1.11.',      # Presentation States
+    '1.2.840.10008.5.1.4.1.1.66',       # Raw Data, Spatial Registration, Segmentation surfaces
+    '1.2.840.10008.5.1.4.1.1.88.',      # Structured Reports
+    '1.2.840.10008.5.1.4.1.1.104.',     # Documents encapsulés (PDF, CDA)
+    '1.2.840.10008.5.1.4.1.1.481.3',    # RT Structure Set
+    '1.2.840.10008.5.1.4.1.1.481.4',    # RT Beams Treatment Record
+    '1.2.840.10008.5.1.4.1.1.481.5',    # RT Plan
+    '1.2.840.10008.5.1.4.1.1.481.8',    # RT Ion Plan
+)
+
+# Clé de patient_info → mot-clé DICOM lu dans le premier fichier de la série
+PATIENT_INFO_TAGS = (
+    ('id', 'PatientID'),
+    ('name', 'PatientName'),
+    ('birth_date', 'PatientBirthDate'),
+    ('sex', 'PatientSex'),
+    ('study_date', 'StudyDate'),
+    ('modality', 'Modality'),
+    ('manufacturer', 'Manufacturer'),
+    ('institution', 'InstitutionName'),
+)
+
+def _is_dicom(filepath: str) -> bool:
+    """Vrai si le fichier porte le préfixe 'DICM' après le préambule de 128 octets."""
+    try:
+        with open(filepath, 'rb') as f:
+            f.seek(128)
+            return f.read(4) == b'DICM'
+    except OSError:
+        return False
+
+def _iter_files(folder_path: str):
+    """
+    Chemins des fichiers sous folder_path, récursivement, via os.scandir.
+
+    Même ordre qu'os.walk (fichiers d'un dossier, puis ses sous-dossiers) ;
+    le type de chaque entrée vient de la lecture du dossier, sans stat
+    supplémentaire. Les liens symboliques vers des dossiers ne sont pas suivis.
+    """
+    stack = [folder_path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                subdirs = []
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        yield entry.path
+        except OSError:
+            continue
+        stack.extend(reversed(subdirs))
+
+# slots=True n'existe qu'à partir de Python 3.10 (setup.py : >= 3.8)
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_SLOTS)
 class PatientData:
     """Structure de données pour un patient"""
     id: str
@@ -26,46 +89,36 @@ class DICOMManager:
 
     def load_folder(self, folder_path: str) -> PatientData:
         """Charger un dossier contenant des fichiers DICOM"""
-        dicom_files = []
         patient_info = {}
         
         if not os.path.exists(folder_path):
             raise FileNotFoundError(f"Dossier introuvable: {folder_path}")
 
-        # Parcourir le dossier
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                filepath = os.path.join(root, file)
-                try:
-                    # Lecture partielle (rapide) sans les pixels
-                    ds = pydicom.dcmread(filepath, stop_before_pixels=True)
-                    
-                    # Identifier les fichiers image DICOM :
-                    # Un fichier image doit avoir Rows ET Columns (dimensions image)
-                    # La vérification PixelData avec stop_before_pixels=True ne fonctionne pas
-                    has_image = hasattr(ds, 'Rows') and hasattr(ds, 'Columns') and \
-                                int(getattr(ds, 'Rows', 0)) > 0 and \
-                                int(getattr(ds, 'Columns', 0)) > 0
-                    
-                    if has_image:
-                        # Lire le fichier complet avec les pixels
-                        full_ds = pydicom.dcmread(filepath)
-                        dicom_files.append(full_ds)
-                        
-                        # Extraire les infos patient du premier fichier valide
-                        if not patient_info:
-                            patient_info = self._extract_patient_info(full_ds)
-                            
-                except (pydicom.errors.InvalidDicomError, IsADirectoryError):
-                    continue
-                except Exception as e:
-                    logger.warning(f"Erreur de lecture {filepath}: {e}")
+        # Parcourir le dossier, puis lire les fichiers en parallèle
+        # (lectures indépendantes ; pydicom libère le GIL pendant les E/S)
+        paths = list(_iter_files(folder_path))
+        with ThreadPoolExecutor(max_workers=min(16, (os.cpu_count() or 1) * 2)) as pool:
+            errors = []
+            datasets = list(pool.map(
+                lambda path: self._read_image_dataset(path, errors), paths
+            ))
+        if errors:
+            # Un seul avertissement récapitulatif plutôt qu'un par fichier
+            logger.warning(
+                f"{len(errors)} fichier(s) illisible(s) ignoré(s) ; premiers : {errors[:10]}"
+            )
+
+        # L'ordre de parcours est conservé : les infos patient viennent du
+        # premier fichier image valide, comme en lecture séquentielle
+        dicom_files = [ds for ds in datasets if ds is not None]
+        if dicom_files:
+            patient_info = self._extract_patient_info(dicom_files[0])
 
         if not dicom_files:
             raise ValueError("Aucun fichier DICOM valide trouvé dans ce dossier")
 
         # Trier par InstanceNumber ou ImagePositionPatient
-        dicom_files.sort(key=lambda x: int(x.InstanceNumber) if 'InstanceNumber' in x else x.filename)
+        dicom_files = self._sort_slices(dicom_files)
 
         # Extraire le spacing depuis les métadonnées DICOM
         spacing = self._extract_spacing(dicom_files)
@@ -83,6 +136,67 @@ class DICOMManager:
         logger.info(f"Chargé {len(dicom_files)} fichiers DICOM pour le patient {patient_id}, spacing={spacing}")
         return self.current_patient
 
+    @staticmethod
+    def _read_image_dataset(filepath: str, errors: Optional[list] = None) -> Optional[pydicom.dataset.FileDataset]:
+        """
+        Lire un fichier DICOM image, ou None s'il n'est pas lisible / sans image.
+
+        errors : si fournie, les erreurs de lecture y sont ajoutées sous forme
+        (chemin, message) au lieu d'être journalisées une par une.
+        """
+        # Fichiers non DICOM (vignettes, textes...) écartés sur 4 octets,
+        # sans passer par le parseur de pydicom
+        if not _is_dicom(filepath):
+            return None
+        try:
+            # En-tête fichier seul (quelques centaines d'octets) : les objets
+            # connus pour ne pas contenir d'image ne sont pas analysés
+            meta = pydicom.filereader.read_file_meta_info(filepath)
+            sop_class = str(meta.get('MediaStorageSOPClassUID', ''))
+            if sop_class.startswith(NON_IMAGE_SOP_CLASSES):
+                return None
+
+            # Une seule lecture du dataset : PixelData différé
+            # (relu depuis le fichier au premier accès à pixel_array)
+            ds = pydicom.dcmread(filepath, defer_size='1 KB')
+        except (pydicom.errors.InvalidDicomError, IsADirectoryError):
+            return None
+        except Exception as e:
+            if errors is None:
+                logger.warning(f"Erreur de lecture {filepath}: {e}")
+            else:
+                errors.append((filepath, str(e)))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Erreur de lecture {filepath}: {e}")
+            return None
+
+        # Identifier les fichiers image DICOM :
+        # Un fichier image doit avoir Rows ET Columns (dimensions image)
+        has_image = int(getattr(ds, 'Rows', 0) or 0) > 0 and \
+                    int(getattr(ds, 'Columns', 0) or 0) > 0
+        return ds if has_image else None
+
+    @staticmethod
+    def _sort_slices(dicom_files: List[pydicom.dataset.FileDataset]) -> List[pydicom.dataset.FileDataset]:
+        """
+        Ordonner les coupes : InstanceNumber si toutes en ont un, sinon
+        ImagePositionPatient[2], sinon le nom de fichier.
+
+        Les clés sont extraites une fois dans un tableau et triées par
+        np.argsort (stable : l'ordre de lecture départage les ex aequo).
+        """
+        n = len(dicom_files)
+        if all('InstanceNumber' in ds for ds in dicom_files):
+            keys = np.fromiter((int(ds.InstanceNumber) for ds in dicom_files),
+                               dtype=np.int64, count=n)
+        elif all('ImagePositionPatient' in ds for ds in dicom_files):
+            keys = np.fromiter((float(ds.ImagePositionPatient[2]) for ds in dicom_files),
+                               dtype=np.float64, count=n)
+        else:
+            return sorted(dicom_files, key=lambda ds: ds.filename)
+        order = np.argsort(keys, kind='stable')
+        return [dicom_files[i] for i in order]
+
     def _extract_spacing(self, dicom_files) -> tuple:
         """Extraire (dz, dy, dx) en mm depuis les métadonnées."""
         try:
@@ -98,31 +212,112 @@ class DICOMManager:
 
     def _extract_patient_info(self, ds: pydicom.dataset.FileDataset) -> Dict[str, Any]:
         """Extraire les métadonnées pertinentes"""
-        def get_val(tag, default="N/A"):
-            return str(getattr(ds, tag, default))
-
-        return {
-            'id': get_val('PatientID'),
-            'name': get_val('PatientName'),
-            'birth_date': get_val('PatientBirthDate'),
-            'sex': get_val('PatientSex'),
-            'study_date': get_val('StudyDate'),
-            'modality': get_val('Modality'),
-            'manufacturer': get_val('Manufacturer'),
-            'institution': get_val('InstitutionName')
-        }
-
-    def get_volume_array(self) -> np.ndarray:
-        """Convertir les slices en volume numpy 3D avec correction HU."""
+        return {key: str(getattr(ds, tag, "N/A")) for key, tag in PATIENT_INFO_TAGS}
+
+    def get_volume_array(self, release_pixels: bool = False) -> np.ndarray:
+        """
+        Convertir les slices en volume numpy 3D avec correction HU.
+
+        Les pixels sont empilés dans leur type natif (int16/uint16), puis la
+        correction slope/intercept est appliquée en une fois sur tout le volume
+        (scalaire si elle est uniforme sur la série, cas courant en CT).
+        Les coupes non compressées sont lues directement depuis PixelData,
+        sans passer par le décodeur de pydicom.
+
+        release_pixels : libérer PixelData et le pixel_array décodé de chaque
+        slice dès sa copie dans le volume — le pic mémoire ne contient plus
+        deux exemplaires de la série. Les slices ne sont alors plus affichables.
+        """
         if not self.current_patient or not self.current_patient.slices:
             return np.array([])
         slices = self.current_patient.slices
         shape = (len(slices), slices[0].Rows, slices[0].Columns)
-        volume = np.zeros(shape, dtype=np.float32)
+        slopes = np.empty(len(slices), dtype=np.float32)
+        intercepts = np.empty(len(slices), dtype=np.float32)
+
+        raw = None
         for i, s in enumerate(slices):
-            arr = s.pixel_array.astype(np.float32)
-            slope = float(getattr(s, 'RescaleSlope', 1.0))
-            intercept = float(getattr(s, 'RescaleIntercept', 0.0))
-            volume[i] = arr * slope + intercept
+            arr = self._uncompressed_pixels(s)
+            if arr is None:
+                arr = s.pixel_array
+            if raw is None:
+                raw = np.empty(shape, dtype=arr.dtype)
+            elif not np.can_cast(arr.dtype, raw.dtype):
+                raw = raw.astype(np.float32)
+            raw[i] = arr
+            del arr
+            if release_pixels:
+                self._release_pixel_data(s)
+            slopes[i] = float(getattr(s, 'RescaleSlope', 1.0))
+            intercepts[i] = float(getattr(s, 'RescaleIntercept', 0.0))
+
+        volume = raw.astype(np.float32, copy=False)
+        if np.all(slopes == slopes[0]) and np.all(intercepts == intercepts[0]):
+            if slopes[0] != 1.0:
+                volume *= slopes[0]
+            if intercepts[0] != 0.0:
+                volume += intercepts[0]
+        else:
+            volume *= slopes[:, None, None]
+            volume += intercepts[:, None, None]
         self.current_patient.volume = volume
         return volume
+
+    @staticmethod
+    def _uncompressed_pixels(ds: pydicom.dataset.FileDataset) -> Optional[np.ndarray]:
+        """
+        Vue numpy (Rows, Columns) sur PixelData pour une coupe monochrome non
+        compressée en little endian, ou None si le décodage de pydicom est requis.
+
+        Comme pixel_array, les bits au-delà de BitsStored sont masqués (non
+        signé) ou servent à l'extension de signe (signé).
+        """
+        file_meta = getattr(ds, 'file_meta', None)
+        tsyntax = getattr(file_meta, 'TransferSyntaxUID', None)
+        if tsyntax is None or tsyntax.is_compressed or not tsyntax.is_little_endian:
+            return None
+        bits = int(getattr(ds, 'BitsAllocated', 0) or 0)
+        if bits not in (8, 16, 32) or 'PixelData' not in ds:
+            return None
+        if int(getattr(ds, 'SamplesPerPixel', 1) or 1) != 1 or \
+                int(getattr(ds, 'NumberOfFrames', 1) or 1) != 1:
+            return None
+
+        signed = int(getattr(ds, 'PixelRepresentation', 0) or 0) == 1
+        dtype = np.dtype(f"<{'i' if signed else 'u'}{bits // 8}")
+        n = int(ds.Rows) * int(ds.Columns)
+        data = ds.PixelData
+        if len(data) < n * dtype.itemsize:
+            return None
+        arr = np.frombuffer(data, dtype=dtype, count=n).reshape(ds.Rows, ds.Columns)
+
+        stored = int(getattr(ds, 'BitsStored', bits) or bits)
+        if stored < bits:
+            if signed:
+                shift = bits - stored
+                arr = (arr << shift) >> shift
+            else:
+                arr = arr & dtype.type((1 << stored) - 1)
+        return arr
+
+    @staticmethod
+    def read_slice_pixels(ds: pydicom.dataset.FileDataset) -> np.ndarray:
+        """
+        Décoder les pixels d'une coupe sans les conserver dans son dataset.
+
+        Les datasets de load_folder ont leur PixelData différé : le relire
+        depuis le fichier évite que chaque coupe affichée garde ses octets
+        bruts et son pixel_array en mémoire jusqu'à la fermeture du patient.
+        """
+        filename = getattr(ds, 'filename', None)
+        if isinstance(filename, str) and os.path.isfile(filename):
+            return pydicom.dcmread(filename).pixel_array
+        return ds.pixel_array
+
+    @staticmethod
+    def _release_pixel_data(ds: pydicom.dataset.FileDataset):
+        """Supprimer les octets PixelData et le cache pixel_array d'un dataset."""
+        if 'PixelData' in ds:
+            del ds.PixelData
+        if getattr(ds, '_pixel_array', None) is not None:
+            ds._pixel_array = None
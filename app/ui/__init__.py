@@ -2,24 +2,26 @@
 Package UI - Interface utilisateur de SpineAnalyzer Pro
 """
 
-from .main_window import MainWindow
-from .styles import load_stylesheet, get_icon
-from .widgets import (
-    DICOMViewer,
-    VolumeViewer,
-    SliceNavigator,
-    AnnotationTool,
-    MeasurementTool,
-    ResultsPanel,
-    ControlPanel,
-    PatientInfoWidget
-)
-from .dialogs import (
-    SettingsDialog,
-    ExportDialog,
-    AboutDialog,
-    # ModelSelectDialog  # TODO: Implement ModelSelectDialog
-)
+from ._lazy import _lazy_module_getattr
+
+# Nom public → module qui le définit (PySide6, VTK... chargés au premier accès)
+_LAZY_IMPORTS = {
+    'MainWindow': '.main_window',
+    'load_stylesheet': '.styles',
+    'get_icon': '.styles',
+    'DICOMViewer': '.widgets',
+    'VolumeViewer': '.widgets',
+    'SliceNavigator': '.widgets',
+    'AnnotationTool': '.widgets',
+    'MeasurementTool': '.widgets',
+    'ResultsPanel': '.widgets',
+    'ControlPanel': '.widgets',
+    'PatientInfoWidget': '.widgets',
+    'SettingsDialog': '.dialogs',
+    'ExportDialog': '.dialogs',
+    'AboutDialog': '.dialogs',
+    # 'ModelSelectDialog': '.dialogs',  # TODO: Implement ModelSelectDialog
+}
 
 __all__ = [
     'MainWindow',
@@ -37,4 +39,7 @@ __all__ = [
     'ExportDialog',
     'AboutDialog',
     # 'ModelSelectDialog'
-]
\ No newline at end of file
+]
+
+
+__getattr__, __dir__ = _lazy_module_getattr(__name__, _LAZY_IMPORTS)
@@ -0,0 +1,29 @@
+"""
+Imports différés (PEP 562) partagés par les packages UI.
+"""
+
+import importlib
+import sys
+
+
+def _lazy_module_getattr(package: str, mapping: dict):
+    """
+    Retourne (__getattr__, __dir__) pour un package dont les noms publics
+    ne sont importés qu'au premier accès.
+
+    mapping : nom public → module relatif qui le définit (ex. '.main_window').
+    La valeur résolue est mise en cache dans le namespace du package.
+    """
+    def __getattr__(name):
+        module_name = mapping.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        vars(sys.modules[package])[name] = value
+        return value
+
+    def __dir__():
+        namespace = vars(sys.modules[package])
+        return sorted(set(namespace) | set(namespace.get('__all__', ())))
+
+    return __getattr__, __dir__
@@ -2,10 +2,15 @@
 Dialogs for SpineAnalyzer Pro
 """
 
-from .about_dialog import AboutDialog
-from .export_dialog import ExportDialog
-from .settings_dialog import SettingsDialog
-# from .model_select_dialog import ModelSelectDialog  # TODO: Implement if needed
+from .._lazy import _lazy_module_getattr
+
+# Chaque boîte de dialogue n'est importée qu'à sa première utilisation
+_LAZY_IMPORTS = {
+    'AboutDialog': '.about_dialog',
+    'ExportDialog': '.export_dialog',
+    'SettingsDialog': '.settings_dialog',
+    # 'ModelSelectDialog': '.model_select_dialog',  # TODO: Implement if needed
+}
 
 __all__ = [
     'AboutDialog',
@@ -13,3 +18,6 @@ __all__ = [
     'SettingsDialog',
     # 'ModelSelectDialog'
 ]
+
+
+__getattr__, __dir__ = _lazy_module_getattr(__name__, _LAZY_IMPORTS)
@@ -8,6 +8,19 @@ from PySide6.QtGui import QFont, QPixmap
 
 from ...core.config import Config
 
+# Texte de présentation (statique, défini une seule fois)
+DESCRIPTION_HTML = """
+<p><b>SpineAnalyzer Pro</b> est une application médicale d'analyse rachidienne assistée par intelligence artificielle.</p>
+<p>Cette application permet :</p>
+<ul>
+    <li>La visualisation d'images DICOM</li>
+    <li>La reconstruction 3D du rachis</li>
+    <li>La détection automatique d'anomalies (fractures, hernies, etc.)</li>
+    <li>L'analyse quantitative et biométrique</li>
+</ul>
+<p><i>Développé par l'équipe MedicalAI.</i></p>
+"""
+
 class AboutDialog(QDialog):
     """Boîte de dialogue À propos"""
     
@@ -52,18 +65,7 @@ class AboutDialog(QDialog):
         layout.addWidget(line)
         
         # Description
-        desc_text = """
-        <p><b>SpineAnalyzer Pro</b> est une application médicale d'analyse rachidienne assistée par intelligence artificielle.</p>
-        <p>Cette application permet :</p>
-        <ul>
-            <li>La visualisation d'images DICOM</li>
-            <li>La reconstruction 3D du rachis</li>
-            <li>La détection automatique d'anomalies (fractures, hernies, etc.)</li>
-            <li>L'analyse quantitative et biométrique</li>
-        </ul>
-        <p><i>Développé par l'équipe MedicalAI.</i></p>
-        """
-        desc = QLabel(desc_text)
+        desc = QLabel(DESCRIPTION_HTML)
         desc.setWordWrap(True)
         desc.setTextFormat(Qt.RichText)
         layout.addWidget(desc)
@@ -5,11 +5,10 @@ Boîte de dialogue des paramètres
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QTabWidget,
     QWidget, QLabel, QComboBox, QSpinBox, QDoubleSpinBox,
-    QCheckBox, QLineEdit, QPushButton, QGroupBox,
-    QFormLayout, QFileDialog, QMessageBox, QListWidget
+    QCheckBox, QLineEdit, QPushButton,
+    QFormLayout, QListWidget
 )
-from PySide6.QtCore import Qt, Signal, Slot
-from PySide6.QtGui import QIntValidator, QDoubleValidator
+from PySide6.QtCore import Signal, Slot, QTimer
 
 from ...core.config import Config
 from ...core.logger import get_logger
@@ -22,10 +21,64 @@ class SettingsDialog(QDialog):
     
     settings_changed = Signal(dict)
     
+    # Valeurs de config des listes déroulantes, dans l'ordre des éléments
+    _THEMES = ('dark', 'light', 'medical')
+    _LANGUAGES = ('fr', 'en', 'es')
+    _DEVICES = ('auto', 'cpu', 'gpu')
+    _COMPRESSIONS = ('none', 'light', 'medium', 'strong')
+    _LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+    _FORMATS = ('pdf', 'html', 'dicom_sr', 'docx')
+    
+    # Modèles pré-entraînés listés dans l'onglet IA
+    _MODEL_NAMES = (
+        "Ségmentation vertébrale",
+        "Détection fractures",
+        "Classification tumeurs",
+        "Reconstruction 3D",
+    )
+    
+    # Liaisons widget ↔ config, par onglet : (clé, attribut du widget, genre, défaut).
+    # Genre : 'value' (QSpinBox), 'checked' (QCheckBox), 'text' (QLineEdit),
+    # ou tuple des valeurs de config d'une liste déroulante, dans l'ordre.
+    _BINDINGS = {
+        0: (
+            ('ui/theme', 'theme_combo', _THEMES, 'dark'),
+            ('ui/language', 'language_combo', _LANGUAGES, 'fr'),
+            ('ui/font_size', 'font_size_spin', 'value', 10),
+            ('last_folder', 'last_folder_edit', 'text', ''),
+            ('ui/auto_load', 'check_auto_load', 'checked', True),
+            ('ui/auto_report', 'check_auto_report', 'checked', False),
+            ('ui/save_window_state', 'check_save_window_state', 'checked', True),
+        ),
+        1: (
+            ('ai/device', 'device_combo', _DEVICES, 'auto'),
+            ('ai/batch_size', 'batch_size_spin', 'value', 4),
+            ('ai/confidence_threshold', 'confidence_spin', 'value', 0.5),
+            ('ai/model_path', 'model_path_edit', 'text', './models'),
+        ),
+        2: (
+            ('performance/threads', 'threads_spin', 'value', 4),
+            ('performance/cache_size_mb', 'cache_size_spin', 'value', 1024),
+            ('performance/compression', 'compression_combo', _COMPRESSIONS, 'none'),
+            ('logging/level', 'log_level_combo', _LOG_LEVELS, 'INFO'),
+        ),
+        3: (
+            ('export/format', 'format_combo', _FORMATS, 'pdf'),
+            ('export/path', 'export_path_edit', 'text', './exports'),
+            ('export/include_images', 'check_include_images', 'checked', True),
+            ('export/include_3d', 'check_include_3d', 'checked', False),
+            ('export/open_after_export', 'check_open_after_export', 'checked', True),
+            ('export/include_annotations', 'check_annotations', 'checked', True),
+        ),
+    }
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.config = Config()
         self.settings = {}
+        self._loaded_snapshot = {}  # valeurs affichées au dernier chargement/application
+        self._dir_dialog = None     # sélecteur de dossier partagé, créé au premier clic
+        self._loaded_version = None # Config.version au dernier chargement
         
         self.setup_ui()
         self.load_settings()
@@ -41,21 +94,21 @@ class SettingsDialog(QDialog):
         # Onglets
         self.tab_widget = QTabWidget()
         
-        # Onglet Interface
+        # Onglet Interface (affiché par défaut) : construit immédiatement
         self.ui_tab = self.create_ui_tab()
         self.tab_widget.addTab(self.ui_tab, "Interface")
+        self._built_tabs = {0}
         
-        # Onglet IA/Modèles
-        self.ai_tab = self.create_ai_tab()
-        self.tab_widget.addTab(self.ai_tab, "IA & Modèles")
-        
-        # Onglet Performance
-        self.perf_tab = self.create_performance_tab()
-        self.tab_widget.addTab(self.perf_tab, "Performance")
-        
-        # Onglet Export
-        self.export_tab = self.create_export_tab()
-        self.tab_widget.addTab(self.export_tab, "Export")
+        # Autres onglets : conteneurs vides, remplis à la première visite
+        self._tab_builders = {
+            1: self.create_ai_tab,
+            2: self.create_performance_tab,
+            3: self.create_export_tab,
+        }
+        for title in ("IA & Modèles", "Performance", "Export"):
+            placeholder = QWidget()
+            QVBoxLayout(placeholder).setContentsMargins(0, 0, 0, 0)
+            self.tab_widget.addTab(placeholder, title)
         
         layout.addWidget(self.tab_widget)
         
@@ -67,7 +120,12 @@ class SettingsDialog(QDialog):
         self.btn_cancel = QPushButton("Annuler")
         self.btn_reset = QPushButton("Réinitialiser")
         
+        # Confirmation discrète (remplace une boîte modale à chaque application)
+        self._status_label = QLabel()
+        self._status_label.setStyleSheet("color: #4caf50;")
+        
         button_layout.addWidget(self.btn_reset)
+        button_layout.addWidget(self._status_label)
         button_layout.addStretch()
         button_layout.addWidget(self.btn_apply)
         button_layout.addWidget(self.btn_ok)
@@ -96,13 +154,8 @@ class SettingsDialog(QDialog):
         layout.addRow("Taille police:", self.font_size_spin)
         
         # Dernier dossier
-        self.last_folder_edit = QLineEdit()
-        self.btn_browse_folder = QPushButton("Parcourir...")
-        
-        folder_layout = QHBoxLayout()
-        folder_layout.addWidget(self.last_folder_edit)
-        folder_layout.addWidget(self.btn_browse_folder)
-        
+        folder_layout, self.last_folder_edit, self.btn_browse_folder = \
+            self._make_path_row("Sélectionner un dossier")
         layout.addRow("Dernier dossier:", folder_layout)
         
         # Options d'interface
@@ -141,27 +194,23 @@ class SettingsDialog(QDialog):
         layout.addRow(QLabel("<b>Modèles pré-entraînés:</b>"))
         
         self.model_list = QListWidget()
-        self.model_list.addItems([
-            "Ségmentation vertébrale",
-            "Détection fractures",
-            "Classification tumeurs",
-            "Reconstruction 3D"
-        ])
         self.model_list.setMaximumHeight(100)
+        # Rempli après l'affichage de l'onglet, au prochain tour de boucle
+        QTimer.singleShot(0, self._populate_model_list)
         layout.addRow(self.model_list)
         
         # Chemin modèles
-        self.model_path_edit = QLineEdit()
-        self.btn_browse_models = QPushButton("Parcourir...")
-        
-        model_path_layout = QHBoxLayout()
-        model_path_layout.addWidget(self.model_path_edit)
-        model_path_layout.addWidget(self.btn_browse_models)
-        
+        model_path_layout, self.model_path_edit, self.btn_browse_models = \
+            self._make_path_row("Sélectionner le dossier des modèles")
         layout.addRow("Dossier modèles:", model_path_layout)
         
         return widget
     
+    def _populate_model_list(self):
+        """Remplir la liste des modèles (une seule fois)"""
+        if self.model_list.count() == 0:
+            self.model_list.addItems(self._MODEL_NAMES)
+    
     def create_performance_tab(self) -> QWidget:
         """Créer l'onglet Performance"""
         widget = QWidget()
@@ -201,13 +250,8 @@ class SettingsDialog(QDialog):
         layout.addRow("Format:", self.format_combo)
         
         # Dossier d'export
-        self.export_path_edit = QLineEdit()
-        self.btn_browse_export = QPushButton("Parcourir...")
-        
-        export_layout = QHBoxLayout()
-        export_layout.addWidget(self.export_path_edit)
-        export_layout.addWidget(self.btn_browse_export)
-        
+        export_layout, self.export_path_edit, self.btn_browse_export = \
+            self._make_path_row("Sélectionner le dossier d'export")
         layout.addRow("Dossier export:", export_layout)
         
         # Options d'export
@@ -223,6 +267,16 @@ class SettingsDialog(QDialog):
         
         return widget
     
+    def _make_path_row(self, dialog_title: str):
+        """Champ de chemin + bouton « Parcourir... » relié à _browse_into."""
+        row = QHBoxLayout()
+        edit = QLineEdit()
+        button = QPushButton("Parcourir...")
+        button.clicked.connect(lambda: self._browse_into(edit, dialog_title))
+        row.addWidget(edit)
+        row.addWidget(button)
+        return row, edit, button
+    
     def setup_connections(self):
         """Établir les connexions"""
         self.btn_apply.clicked.connect(self.apply_settings)
@@ -230,107 +284,114 @@ class SettingsDialog(QDialog):
         self.btn_cancel.clicked.connect(self.reject)
         self.btn_reset.clicked.connect(self.reset_to_defaults)
         
-        self.btn_browse_folder.clicked.connect(self.browse_folder)
-        self.btn_browse_models.clicked.connect(self.browse_models)
-        self.btn_browse_export.clicked.connect(self.browse_export)
+        self.tab_widget.currentChanged.connect(self._on_tab_changed)
+    
+    @Slot(int)
+    def _on_tab_changed(self, index: int):
+        """Construire le contenu d'un onglet lors de sa première visite."""
+        builder = self._tab_builders.pop(index, None)
+        if builder is None:
+            return
+        content = builder()
+        self.tab_widget.widget(index).layout().addWidget(content)
+        self._built_tabs.add(index)
+        self._load_tab(index, self.config.snapshot())
+        self._read_tab(index, self._loaded_snapshot)
     
     def load_settings(self):
-        """Charger les paramètres actuels"""
-        # Interface
-        theme_map = {'dark': 0, 'light': 1, 'medical': 2}
-        theme = self.config.get('ui/theme', 'dark')
-        self.theme_combo.setCurrentIndex(theme_map.get(theme, 0))
-        
-        language = self.config.get('ui/language', 'fr')
-        lang_map = {'fr': 0, 'en': 1, 'es': 2}
-        self.language_combo.setCurrentIndex(lang_map.get(language, 0))
-        
-        self.font_size_spin.setValue(self.config.get('ui/font_size', 10))
-        self.last_folder_edit.setText(self.config.get('last_folder', ''))
-        self.check_auto_load.setChecked(self.config.get('ui/auto_load', True))
-        self.check_auto_report.setChecked(self.config.get('ui/auto_report', False))
-        self.check_save_window_state.setChecked(self.config.get('ui/save_window_state', True))
-        
-        # IA
-        device = self.config.get('ai/device', 'auto')
-        device_map = {'auto': 0, 'cpu': 1, 'gpu': 2}
-        self.device_combo.setCurrentIndex(device_map.get(device, 0))
-        
-        self.batch_size_spin.setValue(self.config.get('ai/batch_size', 4))
-        self.confidence_spin.setValue(self.config.get('ai/confidence_threshold', 0.5))
-        self.model_path_edit.setText(self.config.get('ai/model_path', './models'))
-        
-        # Performance
-        self.threads_spin.setValue(self.config.get('performance/threads', 4))
-        self.cache_size_spin.setValue(self.config.get('performance/cache_size_mb', 1024))
-        
-        compression = self.config.get('performance/compression', 'none')
-        comp_map = {'none': 0, 'light': 1, 'medium': 2, 'strong': 3}
-        self.compression_combo.setCurrentIndex(comp_map.get(compression, 0))
-        
-        log_level = self.config.get('logging/level', 'INFO')
-        level_map = {'DEBUG': 0, 'INFO': 1, 'WARNING': 2, 'ERROR': 3}
-        self.log_level_combo.setCurrentIndex(level_map.get(log_level, 1))
-        
-        # Export
-        export_format = self.config.get('export/format', 'pdf')
-        format_map = {'pdf': 0, 'html': 1, 'dicom_sr': 2, 'docx': 3}
-        self.format_combo.setCurrentIndex(format_map.get(export_format, 0))
-        
-        self.export_path_edit.setText(self.config.get('export/path', './exports'))
-        self.check_include_images.setChecked(self.config.get('export/include_images', True))
-        self.check_include_3d.setChecked(self.config.get('export/include_3d', False))
-        self.check_open_after_export.setChecked(self.config.get('export/open_after_export', True))
-        self.check_annotations.setChecked(self.config.get('export/include_annotations', True))
+        """Charger les paramètres actuels dans les onglets déjà construits"""
+        # Une seule copie de la configuration pour tous les onglets
+        s = self.config.snapshot()
+        for index in sorted(self._built_tabs):
+            self._load_tab(index, s)
+        self._loaded_snapshot = self.get_current_settings()
+        self._loaded_version = self.config.version
+    
+    def refresh_settings(self):
+        """Recharger seulement si la config a changé depuis le dernier chargement"""
+        if self._loaded_version != self.config.version:
+            self.load_settings()
+    
+    def _load_tab(self, index: int, s: dict):
+        """Charger un onglet, signaux de ses widgets bloqués pendant le remplissage"""
+        widgets = self.tab_widget.widget(index).findChildren(QWidget)
+        previous = [w.blockSignals(True) for w in widgets]
+        try:
+            for key, attr, kind, default in self._BINDINGS[index]:
+                widget = getattr(self, attr)
+                value = s.get(key, default)
+                if isinstance(kind, tuple):
+                    widget.setCurrentIndex(kind.index(value if value in kind else default))
+                elif kind == 'value':
+                    widget.setValue(value)
+                elif kind == 'checked':
+                    widget.setChecked(value)
+                else:
+                    widget.setText(value)
+        finally:
+            for w, blocked in zip(widgets, previous):
+                w.blockSignals(blocked)
     
     def get_current_settings(self) -> dict:
-        """Obtenir les paramètres actuels de l'interface"""
-        return {
-            'ui/theme': ['dark', 'light', 'medical'][self.theme_combo.currentIndex()],
-            'ui/language': ['fr', 'en', 'es'][self.language_combo.currentIndex()],
-            'ui/font_size': self.font_size_spin.value(),
-            'last_folder': self.last_folder_edit.text(),
-            'ui/auto_load': self.check_auto_load.isChecked(),
-            'ui/auto_report': self.check_auto_report.isChecked(),
-            'ui/save_window_state': self.check_save_window_state.isChecked(),
-            
-            'ai/device': ['auto', 'cpu', 'gpu'][self.device_combo.currentIndex()],
-            'ai/batch_size': self.batch_size_spin.value(),
-            'ai/confidence_threshold': self.confidence_spin.value(),
-            'ai/model_path': self.model_path_edit.text(),
-            
-            'performance/threads': self.threads_spin.value(),
-            'performance/cache_size_mb': self.cache_size_spin.value(),
-            'performance/compression': ['none', 'light', 'medium', 'strong'][self.compression_combo.currentIndex()],
-            'logging/level': ['DEBUG', 'INFO', 'WARNING', 'ERROR'][self.log_level_combo.currentIndex()],
-            
-            'export/format': ['pdf', 'html', 'dicom_sr', 'docx'][self.format_combo.currentIndex()],
-            'export/path': self.export_path_edit.text(),
-            'export/include_images': self.check_include_images.isChecked(),
-            'export/include_3d': self.check_include_3d.isChecked(),
-            'export/open_after_export': self.check_open_after_export.isChecked(),
-            'export/include_annotations': self.check_annotations.isChecked()
-        }
+        """
+        Obtenir les paramètres actuels de l'interface.
+
+        Seuls les onglets déjà construits sont lus : les clés des onglets
+        jamais ouverts ne sont pas modifiées par apply_settings.
+        """
+        settings = {}
+        for index in sorted(self._built_tabs):
+            self._read_tab(index, settings)
+        return settings
+    
+    def _read_tab(self, index: int, out: dict):
+        """Écrire dans out les valeurs affichées par un onglet"""
+        for key, attr, kind, _ in self._BINDINGS[index]:
+            widget = getattr(self, attr)
+            if isinstance(kind, tuple):
+                out[key] = kind[widget.currentIndex()]
+            elif kind == 'value':
+                out[key] = widget.value()
+            elif kind == 'checked':
+                out[key] = widget.isChecked()
+            else:
+                out[key] = widget.text()
     
     @Slot()
     def apply_settings(self):
         """Appliquer les paramètres"""
         settings = self.get_current_settings()
-        
-        # Sauvegarder dans la configuration
-        for key, value in settings.items():
-            self.config.set(key, value)
-        
-        self.config.save()
+        changed = {k: v for k, v in settings.items() if self._loaded_snapshot.get(k) != v}
+        if not changed:
+            # Rien de modifié : ni écriture, ni signal
+            return
+        
+        # Sauvegarder dans la configuration (clés modifiées uniquement),
+        # en une seule écriture de config.yaml
+        saved = True
+        try:
+            with self.config.batch():
+                self.config.update(changed)
+        except OSError as e:
+            # Valeurs appliquées pour la session, mais pas écrites sur disque
+            logger.error(f"Impossible d'enregistrer config.yaml: {e}")
+            saved = False
+        self._loaded_snapshot = settings
+        self._loaded_version = self.config.version
         
         # Émettre le signal
         self.settings_changed.emit(settings)
         
-        QMessageBox.information(
-            self,
-            "Paramètres",
-            "Paramètres appliqués avec succès."
-        )
+        if saved:
+            self._status_label.setText("✔ Paramètres appliqués")
+            QTimer.singleShot(2000, self._status_label.clear)
+        else:
+            self._status_label.setText("⚠ Paramètres appliqués mais non enregistrés (voir le journal)")
+    
+    def reject(self):
+        """Fermer sans appliquer : les valeurs saisies seront rechargées à la réouverture"""
+        self._loaded_version = None
+        super().reject()
     
     @Slot()
     def accept_and_apply(self):
@@ -341,6 +402,8 @@ class SettingsDialog(QDialog):
     @Slot()
     def reset_to_defaults(self):
         """Réinitialiser aux valeurs par défaut"""
+        from PySide6.QtWidgets import QMessageBox
+        
         reply = QMessageBox.question(
             self,
             "Réinitialiser",
@@ -352,38 +415,34 @@ class SettingsDialog(QDialog):
             self.config.reset_to_defaults()
             self.load_settings()
     
-    @Slot()
-    def browse_folder(self):
-        """Parcourir pour un dossier"""
-        folder = QFileDialog.getExistingDirectory(
-            self,
-            "Sélectionner un dossier",
-            self.last_folder_edit.text()
-        )
-        
-        if folder:
-            self.last_folder_edit.setText(folder)
-    
-    @Slot()
-    def browse_models(self):
-        """Parcourir pour un dossier de modèles"""
-        folder = QFileDialog.getExistingDirectory(
-            self,
-            "Sélectionner le dossier des modèles",
-            self.model_path_edit.text()
-        )
-        
-        if folder:
-            self.model_path_edit.setText(folder)
-    
-    @Slot()
-    def browse_export(self):
-        """Parcourir pour un dossier d'export"""
-        folder = QFileDialog.getExistingDirectory(
-            self,
-            "Sélectionner le dossier d'export",
-            self.export_path_edit.text()
-        )
-        
-        if folder:
-            self.export_path_edit.setText(folder)
\ No newline at end of file
+    def _browse_into(self, edit: QLineEdit, title: str):
+        """Choisir un dossier et l'écrire dans le champ edit"""
+        if self._dir_dialog is None:
+            from PySide6.QtWidgets import QFileDialog
+            self._dir_dialog = QFileDialog(self)
+            self._dir_dialog.setFileMode(QFileDialog.Directory)
+            self._dir_dialog.setOption(QFileDialog.ShowDirsOnly, True)
+        
+        self._dir_dialog.setWindowTitle(title)
+        self._dir_dialog.setDirectory(edit.text())
+        if self._dir_dialog.exec():
+            folders = self._dir_dialog.selectedFiles()
+            if folders:
+                edit.setText(folders[0])
+
+
+def get_settings_dialog(parent) -> SettingsDialog:
+    """
+    Boîte de paramètres de parent, construite au premier appel puis réutilisée.
+
+    L'instance est conservée dans parent._settings_dialog ; à la réouverture,
+    les valeurs ne sont rechargées que si la config a changé entre-temps
+    ou si la saisie précédente a été annulée.
+    """
+    dialog = getattr(parent, '_settings_dialog', None)
+    if dialog is None:
+        dialog = SettingsDialog(parent)
+        parent._settings_dialog = dialog
+    else:
+        dialog.refresh_settings()
+    return dialog
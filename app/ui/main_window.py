@@ -2,6 +2,7 @@
 Fenêtre principale de l'application SpineAnalyzer Pro
 """
 
+import gc
 import os
 import sys
 import psutil
@@ -16,7 +17,8 @@ from PySide6.QtWidgets import (
     QListWidget, QTextEdit, QApplication, QSizePolicy, QFrame
 )
 from PySide6.QtCore import (
-    Qt, QThread, Signal, Slot, QSize, QTimer, QPoint, QRect
+    Qt, QThread, QThreadPool, Signal, Slot, QSize, QTimer, QPoint, QRect, QEvent,
+    QSettings, QByteArray
 )
 from PySide6.QtGui import (
     QAction, QIcon, QKeySequence, QPalette, QColor,
@@ -24,18 +26,12 @@ from PySide6.QtGui import (
 )
 
 from .widgets.dicom_viewer import DICOMViewer
-from .widgets.volume_viewer import VolumeViewer
-from .widgets.results_panel import ResultsPanel
 from .widgets.control_panel import ControlPanel
 from .widgets.patient_info_widget import PatientInfoWidget
 from .widgets.progress_dialog import ProgressDialog
-from .dialogs.settings_dialog import SettingsDialog
-from .dialogs.export_dialog import ExportDialog
-from .dialogs.about_dialog import AboutDialog
-from ..data.dicom_loader import DICOMManager
-from ..ai.reconstruction.spine_reconstructor import SpineReconstructor
-from ..ai.detection.anomaly_detector import AnomalyDetector
-from ..workers.analysis_worker import AnalysisWorker
+from .styles import get_icon as get_style_icon, load_stylesheet
+from ..workers.dicom_load_worker import DicomLoadWorker
+from ..workers.analysis_worker import AnalysisRunnable, AnalysisSignals
 from ..workers.reconstruction_worker import ReconstructionWorker
 from ..core.config import Config
 from ..core.logger import get_logger
@@ -46,7 +42,8 @@ logger = get_logger(__name__)
 class MainWindow(QMainWindow):
     """Fenêtre principale de l'application"""
     
-    # Signaux personnalisés
+    # Signaux personnalisés — tous émis dans le thread GUI : les signaux des
+    # workers y sont relayés par une connexion explicitement en file (Queued)
     analysis_started = Signal()
     analysis_progress = Signal(int, str)
     analysis_finished = Signal(dict)
@@ -61,6 +58,10 @@ class MainWindow(QMainWindow):
         self.current_mesh = None
         self.detected_anomalies = []
         self.is_analysis_running = False
+        self._about_dialog = None  # construit au premier affichage, puis réutilisé
+        self._settings_dialog = None  # idem, via get_settings_dialog()
+        self._volume_viewer = None  # VTK/OpenGL : construit à la première visite de l'onglet 3D
+        self._results_panel = None  # construit au premier affichage de résultats
         
         self.setup_ui()
         self.setup_connections()
@@ -119,6 +120,11 @@ class MainWindow(QMainWindow):
         self.action_export.triggered.connect(self.export_report)
         file_menu.addAction(self.action_export)
         
+        self.action_settings = QAction("&Paramètres...", self)
+        self.action_settings.setShortcut(QKeySequence.Preferences)
+        self.action_settings.triggered.connect(self.show_settings)
+        file_menu.addAction(self.action_settings)
+        
         file_menu.addSeparator()
         
         self.action_quit = QAction(self.get_icon("exit"), "&Quitter", self)
@@ -140,13 +146,13 @@ class MainWindow(QMainWindow):
         self.action_show_control_panel = QAction("Panneau de &Contrôle", self)
         self.action_show_control_panel.setCheckable(True)
         self.action_show_control_panel.setChecked(True)
-        self.action_show_control_panel.triggered.connect(lambda: self.control_dock.setVisible(self.action_show_control_panel.isChecked()))
+        self.action_show_control_panel.toggled.connect(self._set_control_dock_visible)
         view_menu.addAction(self.action_show_control_panel)
         
         self.action_show_results_panel = QAction("Panneau des &Résultats", self)
         self.action_show_results_panel.setCheckable(True)
         self.action_show_results_panel.setChecked(True)
-        self.action_show_results_panel.triggered.connect(lambda: self.results_dock.setVisible(self.action_show_results_panel.isChecked()))
+        self.action_show_results_panel.toggled.connect(self._set_results_dock_visible)
         view_menu.addAction(self.action_show_results_panel)
         
         # --- Tools ---
@@ -180,6 +186,7 @@ class MainWindow(QMainWindow):
     def create_toolbars(self):
         """Créer les barres d'outils"""
         self.main_toolbar = QToolBar("Principal", self)
+        self.main_toolbar.setObjectName("main_toolbar")
         self.main_toolbar.setIconSize(QSize(28, 28))
         self.main_toolbar.setMovable(False)
         self.addToolBar(Qt.TopToolBarArea, self.main_toolbar)
@@ -195,6 +202,7 @@ class MainWindow(QMainWindow):
         
         # View Toolbar
         self.view_toolbar = QToolBar("Vues", self)
+        self.view_toolbar.setObjectName("view_toolbar")
         self.view_toolbar.setIconSize(QSize(24, 24))
         self.addToolBar(Qt.TopToolBarArea, self.view_toolbar)
         
@@ -216,17 +224,42 @@ class MainWindow(QMainWindow):
         self.visualization_tabs.setDocumentMode(True)
         
         self.dicom_viewer = DICOMViewer()
-        self.volume_viewer = VolumeViewer()
-        
         self.visualization_tabs.addTab(self.dicom_viewer, "Visualisation 2D")
-        self.visualization_tabs.addTab(self.volume_viewer, "Reconstruction 3D")
+        
+        # Onglet 3D : conteneur vide, le VolumeViewer est créé à la première visite
+        self.visualization_tabs.addTab(self._make_placeholder(), "Reconstruction 3D")
         
         layout.addWidget(self.visualization_tabs)
     
+    @staticmethod
+    def _make_placeholder() -> QWidget:
+        placeholder = QWidget()
+        QVBoxLayout(placeholder).setContentsMargins(0, 0, 0, 0)
+        return placeholder
+    
+    @property
+    def volume_viewer(self):
+        """Viewer 3D, construit (et importé) au premier accès."""
+        if self._volume_viewer is None:
+            from .widgets.volume_viewer import VolumeViewer
+            self._volume_viewer = VolumeViewer()
+            self.visualization_tabs.widget(1).layout().addWidget(self._volume_viewer)
+        return self._volume_viewer
+    
+    @property
+    def results_panel(self):
+        """Panneau des résultats, construit au premier accès."""
+        if self._results_panel is None:
+            from .widgets.results_panel import ResultsPanel
+            self._results_panel = ResultsPanel()
+            self.results_dock.widget().layout().addWidget(self._results_panel)
+        return self._results_panel
+    
     def create_dock_widgets(self):
         """Créer les docks"""
         # Control Dock (Left)
         self.control_dock = QDockWidget("Panneau de Contrôle", self)
+        self.control_dock.setObjectName("control_dock")
         self.control_panel = ControlPanel()
         self.control_dock.setWidget(self.control_panel)
         self.control_dock.setAllowedAreas(Qt.LeftDockWidgetArea | Qt.RightDockWidgetArea)
@@ -234,8 +267,8 @@ class MainWindow(QMainWindow):
         
         # Results Dock (Right)
         self.results_dock = QDockWidget("Résultats d'Analyse", self)
-        self.results_panel = ResultsPanel()
-        self.results_dock.setWidget(self.results_panel)
+        self.results_dock.setObjectName("results_dock")
+        self.results_dock.setWidget(self._make_placeholder())
         self.results_dock.setAllowedAreas(Qt.RightDockWidgetArea | Qt.LeftDockWidgetArea)
         self.addDockWidget(Qt.RightDockWidgetArea, self.results_dock)
     
@@ -266,72 +299,165 @@ class MainWindow(QMainWindow):
         
     def setup_connections(self):
         # Viewers
-        self.dicom_viewer.slice_changed.connect(
-            lambda i: self.status_bar.showMessage(f"Slice: {i}")
-        )
+        self.dicom_viewer.slice_changed.connect(self._on_slice_changed)
+        
+        self.visualization_tabs.currentChanged.connect(self._on_visualization_tab_changed)
         
         # Control Panel
         self.control_panel.analysis_requested.connect(self.run_analysis)
         self.control_panel.export_requested.connect(self.export_report)
         
-        # Analysis Signals
-        self.analysis_progress.connect(self.update_progress)
-        self.analysis_finished.connect(self.on_analysis_finished)
-        self.analysis_error.connect(self.on_analysis_error)
-        self.patient_loaded.connect(self.on_patient_loaded)
-        
-        # Performance Timer
-        self.perf_timer = QTimer()
+        # Analysis Signals : émetteur et récepteur dans le thread GUI, appel direct
+        self.analysis_progress.connect(self.update_progress, Qt.DirectConnection)
+        self.analysis_finished.connect(self.on_analysis_finished, Qt.DirectConnection)
+        self.analysis_error.connect(self.on_analysis_error, Qt.DirectConnection)
+        self.patient_loaded.connect(self.on_patient_loaded, Qt.DirectConnection)
+        
+        # Progression : au plus un rafraîchissement toutes les 50 ms,
+        # quel que soit le nombre de signaux émis par les workers
+        self._pending_progress = None
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setSingleShot(True)
+        self._progress_timer.setInterval(50)
+        self._progress_timer.timeout.connect(self._flush_progress)
+        
+        # Performance Timer : timer grossier, regroupable par Qt avec les
+        # autres réveils, et suspendu quand la fenêtre est réduite
+        self.perf_timer = QTimer(self)
+        self.perf_timer.setTimerType(Qt.VeryCoarseTimer)
         self.perf_timer.timeout.connect(self.update_system_stats)
         self.perf_timer.start(2000)
         
+    @Slot(int)
+    def _on_slice_changed(self, index: int):
+        self.status_bar.showMessage(f"Slice: {index}")
+    
+    @Slot(bool)
+    def _set_control_dock_visible(self, checked: bool):
+        self.control_dock.setVisible(checked)
+    
+    @Slot(bool)
+    def _set_results_dock_visible(self, checked: bool):
+        self.results_dock.setVisible(checked)
+    
+    @Slot(int)
+    def _on_visualization_tab_changed(self, index: int):
+        if index == 1:
+            self.volume_viewer  # la propriété construit le viewer 3D si besoin
+    
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            if self.isMinimized():
+                self.perf_timer.stop()
+            elif not self.perf_timer.isActive():
+                self.perf_timer.start()
+        super().changeEvent(event)
+    
     def update_system_stats(self):
         try:
-            cpu = psutil.cpu_percent()
-            ram = psutil.virtual_memory().percent
-            self.sys_cpu_label.setText(f"CPU: {cpu}%")
-            self.sys_ram_label.setText(f"RAM: {ram}%")
+            cpu = f"CPU: {psutil.cpu_percent()}%"
+            ram = f"RAM: {psutil.virtual_memory().percent}%"
         except:
-            pass
+            return
+        # Pas de setText (ni de relayout de la barre de statut) si rien n'a changé
+        if self.sys_cpu_label.text() != cpu:
+            self.sys_cpu_label.setText(cpu)
+        if self.sys_ram_label.text() != ram:
+            self.sys_ram_label.setText(ram)
             
     # ... (Rest of the methods: load_settings, load_style, open_dicom_folder, etc. 
     # would be similar but improved. I will implement the critical ones here)
     
     def load_settings(self):
-        pass # Placeholder for brevity, similar to original
+        """Restaurer la géométrie et la disposition des docks de la session précédente"""
+        # Blobs Qt opaques : lus tels quels via QSettings, sans passer par
+        # la sérialisation YAML de Config. L'instance est gardée pour closeEvent.
+        self._window_settings = QSettings()
+        geometry = self._window_settings.value("window/geometry", type=QByteArray)
+        if geometry:
+            self.restoreGeometry(geometry)
+        state = self._window_settings.value("window/state", type=QByteArray)
+        if state:
+            self.restoreState(state)
+            self.action_show_control_panel.setChecked(not self.control_dock.isHidden())
+            self.action_show_results_panel.setChecked(not self.results_dock.isHidden())
+    
+    def closeEvent(self, event):
+        self._window_settings.setValue("window/geometry", self.saveGeometry())
+        self._window_settings.setValue("window/state", self.saveState())
+        self._window_settings.sync()
+        super().closeEvent(event)
         
     def load_style(self):
         try:
-            from .styles import load_stylesheet
-            self.setStyleSheet(load_stylesheet("dark"))
+            # Appliquée à l'application plutôt qu'à la fenêtre : toutes les
+            # fenêtres et dialogues en héritent, et Qt ne la réanalyse pas
+            # si une autre fenêtre est construite avec la même feuille
+            app = QApplication.instance()
+            qss = load_stylesheet("dark")
+            if app.styleSheet() != qss:
+                app.setStyleSheet(qss)
         except Exception:
             pass
             
     def get_icon(self, name):
-        return QIcon() # Placeholder
+        return get_style_icon(name)
         
     @Slot()
     def open_dicom_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Sélectionner Dossier DICOM")
         if folder:
             self.status_bar.showMessage("Chargement...")
-            try:
-                manager = DICOMManager()
-                self.current_patient = manager.load_folder(folder)
-                # S'assurer que dicom_folder est bien dans .info et .dicom_folder
-                self.current_patient.dicom_folder = folder
-                self.current_patient.info['dicom_folder'] = folder
-                
-                # Update UI
-                self.dicom_viewer.set_patient_data(self.current_patient)
-                self.control_panel.set_patient_info(self.current_patient.info)
-                self.patient_label.setText(f"Patient: {self.current_patient.info.get('name', 'Inconnu')}")
-                self.patient_loaded.emit(self.current_patient.info)
-                self.status_bar.showMessage(f"DICOM chargé : {len(self.current_patient.slices)} coupes", 3000)
-                
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", str(e))
-                self.status_bar.showMessage("Erreur de chargement")
+            self.action_open_dicom.setEnabled(False)
+            # Durée inconnue : barre de progression indéterminée
+            self.progress_bar.setRange(0, 0)
+            self.progress_bar.setVisible(True)
+            
+            # Lecture DICOM dans un thread séparé : l'interface reste réactive
+            self._loading_folder = folder
+            self.load_worker = DicomLoadWorker(folder)
+            self.load_thread = QThread()
+            self.load_worker.moveToThread(self.load_thread)
+            
+            self.load_thread.started.connect(self.load_worker.run)
+            self.load_worker.progress.connect(self.update_progress, Qt.QueuedConnection)
+            self.load_worker.finished.connect(self._on_dicom_loaded, Qt.QueuedConnection)
+            self.load_worker.error.connect(self._on_dicom_load_error, Qt.QueuedConnection)
+            
+            # Cleanup
+            self.load_worker.finished.connect(self.load_thread.quit)
+            self.load_worker.error.connect(self.load_thread.quit)
+            self.load_thread.finished.connect(self.load_worker.deleteLater)
+            self.load_thread.finished.connect(self.load_thread.deleteLater)
+            
+            self.load_thread.start()
+
+    def _end_dicom_loading(self):
+        self.action_open_dicom.setEnabled(True)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
+
+    @Slot(object)
+    def _on_dicom_loaded(self, patient):
+        self._end_dicom_loading()
+        folder = self._loading_folder
+        self.current_patient = patient
+        # S'assurer que dicom_folder est bien dans .info et .dicom_folder
+        self.current_patient.dicom_folder = folder
+        self.current_patient.info['dicom_folder'] = folder
+        
+        # Update UI
+        self.dicom_viewer.set_patient_data(self.current_patient)
+        self.control_panel.set_patient_info(self.current_patient.info)
+        self.patient_label.setText(f"Patient: {self.current_patient.info.get('name', 'Inconnu')}")
+        self.patient_loaded.emit(self.current_patient.info)
+        self.status_bar.showMessage(f"DICOM chargé : {len(self.current_patient.slices)} coupes", 3000)
+
+    @Slot(str)
+    def _on_dicom_load_error(self, err):
+        self._end_dicom_loading()
+        QMessageBox.critical(self, "Erreur", err)
+        self.status_bar.showMessage("Erreur de chargement")
 
     @Slot()
     def open_dicom_file(self):
@@ -340,6 +466,7 @@ class MainWindow(QMainWindow):
     @Slot()
     def export_report(self):
         if not self.current_patient: return
+        from .dialogs.export_dialog import ExportDialog
         dialog = ExportDialog(self)
         if dialog.exec():
             # Generate report logic
@@ -349,6 +476,10 @@ class MainWindow(QMainWindow):
     def run_analysis(self):
         if not self.current_patient: return
         
+        # Libérer les résultats précédents avant que le worker n'alloue les
+        # nouveaux : pas de double volume/maillage en mémoire pendant l'analyse
+        self._release_analysis_results()
+        
         self.is_analysis_running = True
         self.control_panel.set_analysis_state(True)
         self.action_run_analysis.setEnabled(False)
@@ -362,29 +493,35 @@ class MainWindow(QMainWindow):
             'dicom_folder': self.current_patient.dicom_folder,
             'info': self.current_patient.info,
         }
-        self.worker = AnalysisWorker(patient_dict)
-        self.thread = QThread()
-        self.worker.moveToThread(self.thread)
-        
-        self.thread.started.connect(self.worker.run)
-        self.worker.progress.connect(self.analysis_progress.emit)
-        self.worker.finished.connect(self.analysis_finished.emit)
-        self.worker.error.connect(self.analysis_error.emit)
-        
-        # Cleanup
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
+        # Thread du pool global réutilisé : pas de QThread à créer ni à détruire
+        self.analysis_signals = AnalysisSignals()
+        # Relais signal → signal, mis en file vers le thread GUI
+        self.analysis_signals.progress.connect(self.analysis_progress, Qt.QueuedConnection)
+        self.analysis_signals.finished.connect(self.analysis_finished, Qt.QueuedConnection)
+        self.analysis_signals.error.connect(self.analysis_error, Qt.QueuedConnection)
         
-        self.thread.start()
+        self.analysis_runnable = AnalysisRunnable(patient_dict, self.analysis_signals)
+        QThreadPool.globalInstance().start(self.analysis_runnable)
 
     @Slot()
     def stop_analysis(self):
-        if hasattr(self, 'worker'):
-            self.worker.stop()
+        if hasattr(self, 'analysis_runnable'):
+            self.analysis_runnable.stop()
 
     @Slot(int, str)
     def update_progress(self, val, msg):
+        # Seule la dernière valeur reçue est affichée au prochain tick
+        self._pending_progress = (val, msg)
+        if not self._progress_timer.isActive():
+            self._progress_timer.start()
+
+    @Slot()
+    def _flush_progress(self):
+        pending, self._pending_progress = self._pending_progress, None
+        # Tâche terminée entre-temps : ne pas écraser le message final
+        if pending is None or not self.progress_bar.isVisible():
+            return
+        val, msg = pending
         self.progress_bar.setValue(val)
         self.status_bar.showMessage(msg)
 
@@ -424,8 +561,20 @@ class MainWindow(QMainWindow):
         self.action_run_analysis.setEnabled(True)
         self.action_stop_analysis.setEnabled(False)
         self.progress_bar.setVisible(False)
+        self._release_analysis_results()
         QMessageBox.critical(self, "Erreur Analyse", err)
 
+    def _release_analysis_results(self):
+        self.current_volume = None
+        self.current_mesh = None
+        self.detected_anomalies = []
+        # Widgets pas encore construits : rien à libérer
+        if self._volume_viewer is not None:
+            self._volume_viewer.clear()
+        if self._results_panel is not None:
+            self._results_panel.clear()
+        gc.collect()
+
     @Slot(dict)
     def on_patient_loaded(self, info):
         self.action_run_analysis.setEnabled(True)
@@ -462,9 +611,9 @@ class MainWindow(QMainWindow):
         self.recon_worker.moveToThread(self.recon_thread)
 
         self.recon_thread.started.connect(self.recon_worker.run)
-        self.recon_worker.progress.connect(self._on_recon_progress)
-        self.recon_worker.finished.connect(self._on_recon_finished)
-        self.recon_worker.error.connect(self._on_recon_error)
+        self.recon_worker.progress.connect(self._on_recon_progress, Qt.QueuedConnection)
+        self.recon_worker.finished.connect(self._on_recon_finished, Qt.QueuedConnection)
+        self.recon_worker.error.connect(self._on_recon_error, Qt.QueuedConnection)
 
         self.recon_worker.finished.connect(self.recon_thread.quit)
         self.recon_worker.finished.connect(self.recon_worker.deleteLater)
@@ -474,8 +623,7 @@ class MainWindow(QMainWindow):
 
     @Slot(int, str)
     def _on_recon_progress(self, pct: int, msg: str):
-        self.progress_bar.setValue(pct)
-        self.status_bar.showMessage(f"3D: {msg}")
+        self.update_progress(pct, f"3D: {msg}")
 
     @Slot(dict)
     def _on_recon_finished(self, results: dict):
@@ -519,7 +667,15 @@ class MainWindow(QMainWindow):
             
     @Slot()
     def show_about(self):
-        AboutDialog(self).exec()
+        if self._about_dialog is None:
+            from .dialogs.about_dialog import AboutDialog
+            self._about_dialog = AboutDialog(self)
+        self._about_dialog.exec()
+
+    @Slot()
+    def show_settings(self):
+        from .dialogs.settings_dialog import get_settings_dialog
+        get_settings_dialog(self).exec()
 
     @Slot()
     def set_ui_enabled(self, enabled):
@@ -532,8 +688,9 @@ class MainWindow(QMainWindow):
 
     @Slot()
     def log_message(self, msg, level='info'):
-        # Log to file or console
-        print(f"[{level.upper()}] {msg}")
+        # Via le logging de l'application : l'écriture console/fichier est
+        # faite par le thread du QueueListener, pas par le thread GUI
+        logger.log(getattr(logging, level.upper(), logging.INFO), msg)
     
     @Slot()
     def update_ui_state(self):
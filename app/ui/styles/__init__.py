@@ -4,8 +4,16 @@ from pathlib import Path
 from PySide6.QtWidgets import QApplication, QStyle
 from PySide6.QtGui import QIcon
 
+# Feuilles de style déjà lues, par thème : le fichier n'est lu qu'une fois par processus
+_stylesheets = {}
+
+
 def load_stylesheet(theme_name: str = "dark") -> str:
     """Charger la feuille de style QSS"""
+    qss = _stylesheets.get(theme_name)
+    if qss is not None:
+        return qss
+    
     base_dir = Path(__file__).parent
     
     if theme_name == "dark":
@@ -13,10 +21,54 @@ def load_stylesheet(theme_name: str = "dark") -> str:
     else:
         file_path = base_dir / "light_theme.qss"
         
+    qss = ""
     if file_path.exists():
         with open(file_path, "r") as f:
-            return f.read()
-    return ""
+            qss = f.read()
+    _stylesheets[theme_name] = qss
+    return qss
+
+
+_SP = QStyle.StandardPixmap
+
+# Mapping des noms d'icônes vers les icônes standard Qt
+_STANDARD_ICONS = {
+    # File operations
+    "folder_open": _SP.SP_DirOpenIcon,
+    "file_open": _SP.SP_FileIcon,
+    "save": _SP.SP_DialogSaveButton,
+    "export": _SP.SP_DialogSaveButton,
+    "exit": _SP.SP_DialogCloseButton,
+    
+    # Navigation / Actions
+    "play": _SP.SP_MediaPlay,
+    "stop": _SP.SP_MediaStop,
+    "pause": _SP.SP_MediaPause,
+    "settings": _SP.SP_FileDialogDetailedView,
+    "help": _SP.SP_DialogHelpButton,
+    "about": _SP.SP_MessageBoxInformation,
+    
+    # Views
+    "view_axial": _SP.SP_FileDialogListView,
+    "view_coronal": _SP.SP_FileDialogDetailedView,
+    "view_sagittal": _SP.SP_FileDialogInfoView,
+    
+    # Tools
+    "annotation": _SP.SP_FileIcon,
+    "measure": _SP.SP_FileDialogDetailedView,
+    "compare": _SP.SP_BrowserReload,
+    
+    # Editor
+    "undo": _SP.SP_ArrowBack,
+    "redo": _SP.SP_ArrowForward,
+    
+    # App
+    "app_icon": _SP.SP_DesktopIcon,
+    "3d": _SP.SP_ComputerIcon
+}
+
+# Icônes déjà résolues : un même nom renvoie toujours le même QIcon
+_icon_cache = {}
 
 
 def get_icon(name: str) -> QIcon:
@@ -24,46 +76,9 @@ def get_icon(name: str) -> QIcon:
     Récupérer une icône.
     Utilise les icônes standard de QStyle si disponibles.
     """
-    style = QApplication.style()
-    SP = QStyle.StandardPixmap
-    
-    # Mapping des noms d'icônes vers les icônes standard Qt
-    mapping = {
-        # File operations
-        "folder_open": SP.SP_DirOpenIcon,
-        "file_open": SP.SP_FileIcon,
-        "save": SP.SP_DialogSaveButton,
-        "export": SP.SP_DialogSaveButton,
-        "exit": SP.SP_DialogCloseButton,
-        
-        # Navigation / Actions
-        "play": SP.SP_MediaPlay,
-        "stop": SP.SP_MediaStop,
-        "pause": SP.SP_MediaPause,
-        "settings": SP.SP_FileDialogDetailedView,
-        "help": SP.SP_DialogHelpButton,
-        "about": SP.SP_MessageBoxInformation,
-        
-        # Views
-        "view_axial": SP.SP_FileDialogListView,
-        "view_coronal": SP.SP_FileDialogDetailedView,
-        "view_sagittal": SP.SP_FileDialogInfoView,
-        
-        # Tools
-        "annotation": SP.SP_FileIcon,
-        "measure": SP.SP_FileDialogDetailedView,
-        "compare": SP.SP_BrowserReload,
-        
-        # Editor
-        "undo": SP.SP_ArrowBack,
-        "redo": SP.SP_ArrowForward,
-        
-        # App
-        "app_icon": SP.SP_DesktopIcon,
-        "3d": SP.SP_ComputerIcon
-    }
-    
-    if name in mapping:
-        return style.standardIcon(mapping[name])
-        
-    return QIcon()
\ No newline at end of file
+    icon = _icon_cache.get(name)
+    if icon is None:
+        pixmap = _STANDARD_ICONS.get(name)
+        icon = QApplication.style().standardIcon(pixmap) if pixmap is not None else QIcon()
+        _icon_cache[name] = icon
+    return icon
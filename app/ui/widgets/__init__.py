@@ -2,16 +2,21 @@
 Widgets personnalisés pour l'interface SpineAnalyzer Pro
 """
 
-from .dicom_viewer import DICOMViewer
-from .volume_viewer import VolumeViewer
-from .slice_navigator import SliceNavigator
-from .annotation_tool import AnnotationTool
-from .measurement_tool import MeasurementTool
-from .progress_dialog import ProgressDialog
-from .results_panel import ResultsPanel
-from .control_panel import ControlPanel
-from .patient_info_widget import PatientInfoWidget
-# from .tool_bar import ToolBar  # TODO: Implement ToolBar widget
+from .._lazy import _lazy_module_getattr
+
+# Chaque widget n'est importé qu'à sa première utilisation
+_LAZY_IMPORTS = {
+    'DICOMViewer': '.dicom_viewer',
+    'VolumeViewer': '.volume_viewer',
+    'SliceNavigator': '.slice_navigator',
+    'AnnotationTool': '.annotation_tool',
+    'MeasurementTool': '.measurement_tool',
+    'ProgressDialog': '.progress_dialog',
+    'ResultsPanel': '.results_panel',
+    'ControlPanel': '.control_panel',
+    'PatientInfoWidget': '.patient_info_widget',
+    # 'ToolBar': '.tool_bar',  # TODO: Implement ToolBar widget
+}
 
 __all__ = [
     'DICOMViewer',
@@ -24,4 +29,7 @@ __all__ = [
     'ControlPanel',
     'PatientInfoWidget',
     # 'ToolBar'
-]
\ No newline at end of file
+]
+
+
+__getattr__, __dir__ = _lazy_module_getattr(__name__, _LAZY_IMPORTS)
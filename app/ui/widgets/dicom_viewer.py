@@ -3,6 +3,7 @@ Widget de visualisation d'images DICOM 2D
 """
 
 import numpy as np
+from collections import OrderedDict
 from typing import Optional, Dict, List, Tuple
 import logging
 
@@ -11,18 +12,45 @@ from PySide6.QtWidgets import (
     QPushButton, QComboBox, QSpinBox, QCheckBox, QGroupBox,
     QGridLayout, QSplitter, QScrollArea
 )
-from PySide6.QtCore import Qt, Signal, Slot, QSize, QRect
+from PySide6.QtCore import (
+    Qt, Signal, Slot, QSize, QRect, QObject, QRunnable, QThread, QThreadPool
+)
 from PySide6.QtGui import (
     QImage, QPixmap, QPainter, QPen, QColor, QFont,
     QMouseEvent, QWheelEvent, QKeyEvent
 )
 
-from ...data.dicom_loader import PatientData
+from ...data.dicom_loader import DICOMManager, PatientData
 from ...core.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+class _PrefetchSignals(QObject):
+    """Retour des lectures anticipées vers le thread GUI."""
+    loaded = Signal(int, int, object)  # génération, index de coupe, pixels (None si échec)
+
+
+class _SlicePrefetch(QRunnable):
+    """Lecture anticipée d'une coupe dans un thread du pool."""
+    
+    def __init__(self, generation: int, index: int, dataset, signals: _PrefetchSignals):
+        super().__init__()
+        self.generation = generation
+        self.index = index
+        self.dataset = dataset
+        self.signals = signals
+    
+    def run(self):
+        # Toujours émettre : le viewer doit retirer l'index de ses lectures en cours
+        try:
+            pixels = DICOMManager.read_slice_pixels(self.dataset)
+        except Exception as e:
+            logger.debug(f"Préchargement coupe {self.index} ignoré: {e}")
+            pixels = None
+        self.signals.loaded.emit(self.generation, self.index, pixels)
+
+
 class DICOMViewer(QWidget):
     """Widget pour visualiser les images DICOM en 2D"""
     
@@ -33,6 +61,11 @@ class DICOMViewer(QWidget):
     annotation_added = Signal(dict)  # Annotation ajoutée
     measurement_added = Signal(dict)  # Mesure ajoutée
     
+    # Nombre de coupes décodées gardées en mémoire (les plus récemment affichées)
+    PIXEL_CACHE_SIZE = 32
+    # Coupes voisines lues à l'avance de part et d'autre de la coupe affichée
+    PREFETCH_RADIUS = 4
+    
     def __init__(self, parent: Optional[QWidget] = None):
         super().__init__(parent)
         self.patient_data = None
@@ -46,6 +79,20 @@ class DICOMViewer(QWidget):
         self.last_mouse_pos = None
         self.annotations = []
         self.measurements = []
+        self._pixel_cache = OrderedDict()  # index de coupe → pixels décodés (LRU)
+        # Image d'affichage et tampon de fenêtrage, alloués une fois par taille de coupe
+        self._display_image = None
+        self._display_view = None
+        self._display_buffer = None
+        
+        # Pool dédié au préchargement, borné pour laisser des cœurs à l'UI et
+        # aux workers ; la génération invalide les lectures devenues inutiles
+        self._prefetch_pool = QThreadPool(self)
+        self._prefetch_pool.setMaxThreadCount(max(2, QThread.idealThreadCount() - 3))
+        self._prefetch_signals = _PrefetchSignals(self)
+        self._prefetch_signals.loaded.connect(self._on_slice_prefetched)
+        self._prefetch_generation = 0
+        self._prefetching = set()
         
         self.setup_ui()
         self.setup_connections()
@@ -165,9 +212,7 @@ class DICOMViewer(QWidget):
         self.zoom_slider = QSlider(Qt.Horizontal)
         self.zoom_slider.setRange(10, 500)
         self.zoom_slider.setValue(int(self.zoom_factor * 100))
-        self.zoom_slider.valueChanged.connect(
-            lambda v: self.set_zoom_factor(v / 100.0)
-        )
+        self.zoom_slider.valueChanged.connect(self._on_zoom_slider_changed)
         zoom_layout.addWidget(QLabel("Zoom:"))
         zoom_layout.addWidget(self.zoom_slider)
         
@@ -226,6 +271,8 @@ class DICOMViewer(QWidget):
     def set_patient_data(self, patient_data: PatientData):
         """Définir les données du patient à afficher"""
         self.patient_data = patient_data
+        self._pixel_cache.clear()
+        self._cancel_prefetch()
         
         if patient_data and patient_data.slices:
             # Mettre à jour les contrôles de navigation
@@ -240,6 +287,7 @@ class DICOMViewer(QWidget):
             
             # Afficher la première slice
             self.update_display()
+            self._prefetch_around(0)
             
             # Mettre à jour les informations
             self.update_info_label()
@@ -253,6 +301,9 @@ class DICOMViewer(QWidget):
         index = max(0, min(index, len(self.patient_data.slices) - 1))
         
         if index != self.current_slice_index:
+            # Saut lointain : les lectures anticipées en attente ne servent plus
+            if abs(index - self.current_slice_index) > self.PREFETCH_RADIUS:
+                self._cancel_prefetch()
             self.current_slice_index = index
             
             # Synchroniser les contrôles
@@ -268,6 +319,7 @@ class DICOMViewer(QWidget):
             # Mettre à jour l'affichage
             self.update_display()
             self.update_info_label()
+            self._prefetch_around(index)
             
             # Émettre le signal
             self.slice_changed.emit(index)
@@ -322,6 +374,10 @@ class DICOMViewer(QWidget):
         self.zoom_slider.setValue(int(self.zoom_factor * 100))
         self.update_display()
     
+    @Slot(int)
+    def _on_zoom_slider_changed(self, value: int):
+        self.set_zoom_factor(value / 100.0)
+    
     def update_display(self):
         """Mettre à jour l'affichage de l'image"""
         if not self.patient_data or not self.patient_data.slices:
@@ -330,12 +386,15 @@ class DICOMViewer(QWidget):
         
         # Obtenir la slice courante
         slice_data = self.get_current_slice()
-        if not slice_data or slice_data.pixel_array is None:
+        if not slice_data:
+            return
+        pixels = self._slice_pixels(self.current_slice_index)
+        if pixels is None:
             return
         
         # Convertir les pixels DICOM en QImage
         image = self.dicom_to_qimage(
-            slice_data.pixel_array,
+            pixels,
             self.window_width,
             self.window_level
         )
@@ -368,31 +427,92 @@ class DICOMViewer(QWidget):
                         window_level: int) -> QImage:
         """
         Convertir un array DICOM en QImage avec fenêtrage
+
+        Le QImage et le tampon de calcul sont réécrits sur place d'une coupe
+        à l'autre : pas d'allocation par coupe pendant le défilement. L'image
+        retournée est donc écrasée à l'appel suivant (QPixmap.fromImage et
+        QImage.scaled en font une copie).
         """
         # Appliquer le fenêtrage
         min_val = window_level - window_width // 2
         max_val = window_level + window_width // 2
         
-        # Normaliser entre 0-255
-        normalized = np.clip(pixel_array, min_val, max_val)
-        normalized = ((normalized - min_val) / 
-                     (max_val - min_val) * 255).astype(np.uint8)
-        
-        # Créer l'image
-        height, width = normalized.shape
-        bytes_per_line = width
-        
-        # Convertir en QImage (format grayscale)
-        image = QImage(
-            normalized.data,
-            width,
-            height,
-            bytes_per_line,
-            QImage.Format_Grayscale8
-        )
-        
-        # Copier les données car l'array peut être libéré
-        return image.copy()
+        height, width = pixel_array.shape
+        if self._display_buffer is None or self._display_buffer.shape != (height, width):
+            self._display_image = QImage(width, height, QImage.Format_Grayscale8)
+            # Vue numpy sur les pixels du QImage (lignes alignées sur bytesPerLine)
+            bits = np.frombuffer(self._display_image.bits(), dtype=np.uint8)
+            self._display_view = bits.reshape(
+                height, self._display_image.bytesPerLine()
+            )[:, :width]
+            self._display_buffer = np.empty((height, width), dtype=np.float32)
+        
+        # Normaliser entre 0-255, directement dans le tampon
+        normalized = self._display_buffer
+        np.clip(pixel_array, min_val, max_val, out=normalized)
+        normalized -= min_val
+        normalized *= 255.0 / max(max_val - min_val, 1)
+        
+        # Conversion uint8 (troncature) écrite dans les pixels de l'image
+        self._display_view[...] = normalized
+        return self._display_image
+    
+    def _slice_pixels(self, index: int) -> Optional[np.ndarray]:
+        """
+        Pixels décodés d'une coupe, via un cache LRU de PIXEL_CACHE_SIZE coupes.
+
+        Les données pixel sont lues à la demande depuis le fichier de la
+        coupe, sans rester attachées au dataset : la mémoire occupée ne
+        dépend que de la taille du cache, pas du nombre de coupes parcourues.
+        """
+        pixels = self._pixel_cache.get(index)
+        if pixels is not None:
+            self._pixel_cache.move_to_end(index)
+            return pixels
+        
+        pixels = DICOMManager.read_slice_pixels(self.patient_data.slices[index])
+        self._cache_pixels(index, pixels)
+        return pixels
+    
+    def _cache_pixels(self, index: int, pixels: np.ndarray):
+        self._pixel_cache[index] = pixels
+        if len(self._pixel_cache) > self.PIXEL_CACHE_SIZE:
+            # Coupe la moins récemment affichée
+            _, evicted = self._pixel_cache.popitem(last=False)
+            del evicted
+    
+    def _prefetch_around(self, index: int):
+        """Lancer la lecture des coupes voisines absentes du cache."""
+        num_slices = len(self.patient_data.slices)
+        for offset in range(1, self.PREFETCH_RADIUS + 1):
+            for k in (index + offset, index - offset):
+                if (not 0 <= k < num_slices or k in self._pixel_cache
+                        or k in self._prefetching):
+                    continue
+                task = _SlicePrefetch(
+                    self._prefetch_generation, k,
+                    self.patient_data.slices[k], self._prefetch_signals
+                )
+                # tryStart : pas de file d'attente, on s'arrête si le pool est occupé
+                if not self._prefetch_pool.tryStart(task):
+                    return
+                self._prefetching.add(k)
+    
+    def _cancel_prefetch(self):
+        self._prefetch_pool.clear()
+        self._prefetch_generation += 1
+        self._prefetching.clear()
+    
+    @Slot(int, int, object)
+    def _on_slice_prefetched(self, generation: int, index: int, pixels):
+        if generation != self._prefetch_generation:
+            return
+        self._prefetching.discard(index)
+        if pixels is None:
+            # Lecture échouée : la coupe sera relue à l'affichage ou au prochain préchargement
+            return
+        if index not in self._pixel_cache:
+            self._cache_pixels(index, pixels)
     
     def get_current_slice(self):
         """Obtenir la slice courante selon le mode de vue"""
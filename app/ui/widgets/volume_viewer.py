@@ -13,7 +13,7 @@ from PySide6.QtWidgets import (
     QSlider, QLabel, QGroupBox, QComboBox, QFileDialog,
     QSplitter, QSizePolicy, QCheckBox
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, Slot
 
 import matplotlib
 matplotlib.use("QtAgg")
@@ -86,7 +86,7 @@ class VolumeViewer(QWidget):
         self.opacity_slider = QSlider(Qt.Horizontal)
         self.opacity_slider.setRange(10, 100)
         self.opacity_slider.setValue(85)
-        self.opacity_slider.valueChanged.connect(lambda v: self._set_opacity(v / 100))
+        self.opacity_slider.valueChanged.connect(self._set_opacity)
         vis_layout.addWidget(self.opacity_slider)
         vis_group.setLayout(vis_layout)
         ctrl_layout.addWidget(vis_group)
@@ -205,6 +205,17 @@ class VolumeViewer(QWidget):
         self.volume_checkbox.setEnabled(True)
         self.volume_loaded.emit()
 
+    def clear(self):
+        """Libérer maillage, volume et rendu courant (retour au placeholder)."""
+        self.mesh_data = None
+        self.volume_data = None
+        self._vertebrae = []
+        self.ax.cla()
+        self._style_axes()
+        self._draw_placeholder()
+        self.btn_export_stl.setEnabled(False)
+        self.volume_checkbox.setEnabled(False)
+
     # ──────────────────────────────────────────────────────────────
     # Rendu
     # ──────────────────────────────────────────────────────────────
@@ -353,8 +364,9 @@ class VolumeViewer(QWidget):
         if self.mesh_data is not None:
             self._render_mesh()
 
-    def _set_opacity(self, value):
-        self._opacity = value
+    @Slot(int)
+    def _set_opacity(self, percent):
+        self._opacity = percent / 100
         if self.mesh_data is not None:
             self._render_mesh()
 
@@ -1,85 +1,132 @@
 """
-AnalysisWorker — Pipeline d'analyse complet asynchrone.
+AnalysisRunnable — Pipeline d'analyse complet asynchrone.
 Intègre : reconstruction 3D, détection vertèbres, classification IA, métriques réelles.
+Exécuté par QThreadPool.globalInstance() : pas de QThread créé/détruit par analyse.
 """
 
+import threading
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 
-from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtCore import QObject, QRunnable, Signal
 
-from app.data.dicom_loader import DICOMManager
-from app.ai.reconstruction.spine_reconstructor import SpineReconstructor
-from app.ai.detection.anomaly_detector import AnomalyDetector
-from app.ai.detection.vertebra_detector import VertebraDetector
-from app.ai.detection.vertebra_classifier import VertebraClassifier
-from app.analysis.quantitative import QuantitativeAnalyzer
+from app.core.config import Config
 
 
-class AnalysisWorker(QObject):
-    """Worker pour l'analyse complète asynchrone (QThread)."""
+class AnalysisStopped(Exception):
+    """Analyse interrompue par l'utilisateur."""
+
+
+class AnalysisSignals(QObject):
+    """Signaux de AnalysisRunnable (un QRunnable ne peut pas en porter)."""
 
     progress = Signal(int, str)   # pourcentage, message
     finished = Signal(dict)       # résultats complets
     error    = Signal(str)        # message d'erreur
 
-    def __init__(self, patient_data: Dict[str, Any]):
+
+class AnalysisRunnable(QRunnable):
+    """Tâche d'analyse complète, à lancer via QThreadPool."""
+
+    def __init__(self, patient_data: Dict[str, Any], signals: AnalysisSignals):
         super().__init__()
         self.patient_data = patient_data   # dict avec 'id', 'dicom_folder', 'info'
+        self.signals      = signals
         self.is_running   = False
+        self._stop        = threading.Event()
+        # Référence gardée par l'appelant (pour stop) : le pool ne le détruit pas
+        self.setAutoDelete(False)
+
+    def _check_stop(self):
+        """Point d'arrêt entre deux étapes du pipeline."""
+        if self._stop.is_set():
+            raise AnalysisStopped()
 
-    @Slot()
     def run(self):
+        # Imports différés (comme ReconstructionWorker) : les modules IA ne sont
+        # chargés qu'au lancement d'une analyse, pas à l'ouverture de la fenêtre
+        from app.ai.reconstruction.spine_reconstructor import SpineReconstructor
+        from app.ai.detection.anomaly_detector import AnomalyDetector
+        from app.ai.detection.vertebra_detector import VertebraDetector
+        from app.ai.detection.vertebra_classifier import VertebraClassifier
+        from app.analysis.quantitative import QuantitativeAnalyzer
+
         self.is_running = True
+        config = Config()
+        # Chargement des modèles (YOLO + préchauffage GPU, classifieur) en tâche
+        # de fond, pendant la lecture DICOM et la reconstruction 3D
+        loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-warmup")
+        anom_future = loader.submit(
+            AnomalyDetector,
+            use_tensorrt     = config.get("ai/detection/use_tensorrt", False),
+            use_int8         = config.get("ai/detection/use_int8", False),
+            calibration_data = config.get("ai/detection/calibration_data"),
+            num_workers      = config.get("ai/detection/num_workers", 1),
+        )
+        clf_future = loader.submit(VertebraClassifier)
         try:
             results = {}
             dicom_folder = self.patient_data.get("dicom_folder", "")
 
             # ── 1. Reconstruction 3D ──────────────────────────────────── 0→35%
-            self.progress.emit(0, "Chargement DICOM et reconstruction 3D...")
-            reconstructor = SpineReconstructor(step_size=1)   # step=1 → plus de détails
+            self.signals.progress.emit(0, "Chargement DICOM et reconstruction 3D...")
+            reconstructor = SpineReconstructor(
+                step_size=1,                                  # step=1 → plus de détails
+                cache_dir=config.get("dicom/volume_cache_dir"),
+                cache_max_mb=config.get("dicom/volume_cache_max_mb"),
+                label_stride=config.get("ai/reconstruction/label_stride", 1),
+            )
             recon = reconstructor.reconstruct_from_dicom(
                 dicom_folder,
-                progress_callback=lambda p, m: self.progress.emit(int(p * 0.35), m),
+                progress_callback=lambda p, m: self.signals.progress.emit(int(p * 0.35), m),
             )
             results["reconstruction"] = recon
-            self.progress.emit(35, "Reconstruction 3D terminée")
+            self.signals.progress.emit(35, "Reconstruction 3D terminée")
 
             mesh       = recon.get("mesh")
             volume     = recon.get("original_volume")
             bone_mask  = recon.get("segmentation_mask")
             spacing    = recon.get("spacing", (1.0, 1.0, 1.0))
 
+            self._check_stop()
+
             # ── 2. Détection des vertèbres ─────────────────────────────── 35→60%
-            self.progress.emit(35, "Détection et localisation des vertèbres...")
+            self.signals.progress.emit(35, "Détection et localisation des vertèbres...")
             vertebrae = []
             if bone_mask is not None and volume is not None:
-                detector  = VertebraDetector()
+                detector  = VertebraDetector(
+                    profile_stride=config.get("ai/detection/profile_stride", 1),
+                )
                 vertebrae = detector.detect(bone_mask, volume, spacing=spacing)
 
                 # Classification IA
-                self.progress.emit(50, "Classification IA des vertèbres...")
-                clf = VertebraClassifier()
+                self.signals.progress.emit(50, "Classification IA des vertèbres...")
+                clf = clf_future.result()
                 vertebrae = clf.classify(vertebrae)
 
             results["vertebrae"] = vertebrae
-            self.progress.emit(60, f"{len(vertebrae)} vertèbres détectées et classifiées")
+            self.signals.progress.emit(60, f"{len(vertebrae)} vertèbres détectées et classifiées")
+
+            self._check_stop()
 
             # ── 3. Détection d'anomalies ────────────────────────────────── 60→75%
-            self.progress.emit(60, "Détection d'anomalies...")
+            self.signals.progress.emit(60, "Détection d'anomalies...")
             anomalies = []
             if volume is not None and bone_mask is not None:
-                detector_anom = AnomalyDetector()
                 try:
+                    detector_anom = anom_future.result()
                     anomalies = detector_anom.detect_anomalies(volume, bone_mask)
                 except Exception:
                     anomalies = []
             results["anomalies"] = anomalies
-            self.progress.emit(75, f"{len(anomalies)} anomalies détectées")
+            self.signals.progress.emit(75, f"{len(anomalies)} anomalies détectées")
+
+            self._check_stop()
 
             # ── 4. Analyse quantitative ─────────────────────────────────── 75→90%
-            self.progress.emit(75, "Calcul des métriques rachidiennes...")
+            self.signals.progress.emit(75, "Calcul des métriques rachidiennes...")
             analyzer = QuantitativeAnalyzer()
             quantitative = analyzer.analyze(
                 mesh       = mesh,
@@ -93,23 +140,29 @@ class AnalysisWorker(QObject):
             # Passer mesh et infos vertèbres pour l'affichage 3D
             results["mesh"]      = mesh
             results["vertebrae"] = vertebrae
-            self.progress.emit(90, "Métriques calculées")
+            self.signals.progress.emit(90, "Métriques calculées")
+
+            self._check_stop()
 
             # ── 5. Rapport ─────────────────────────────────────────────── 90→100%
-            self.progress.emit(90, "Génération du rapport...")
+            self.signals.progress.emit(90, "Génération du rapport...")
             results["summary"] = self._generate_summary(results)
-            self.progress.emit(100, "Analyse complète terminée ✅")
+            self.signals.progress.emit(100, "Analyse complète terminée ✅")
 
-            self.finished.emit(results)
+            self.signals.finished.emit(results)
 
+        except AnalysisStopped:
+            self.signals.error.emit("Analyse arrêtée par l'utilisateur")
         except Exception as e:
             tb = traceback.format_exc()
-            self.error.emit(f"Erreur analyse : {e}\n{tb}")
+            self.signals.error.emit(f"Erreur analyse : {e}\n{tb}")
         finally:
+            loader.shutdown(wait=False)
             self.is_running = False
 
     def stop(self):
-        self.is_running = False
+        """Demander l'arrêt ; pris en compte à la fin de l'étape en cours."""
+        self._stop.set()
 
     def _generate_summary(self, results: Dict[str, Any]) -> Dict[str, Any]:
         anomalies  = results.get("anomalies", [])
@@ -0,0 +1,47 @@
+"""
+DicomLoadWorker — Worker Qt asynchrone pour le chargement d'un dossier DICOM.
+S'exécute dans un QThread séparé pour ne pas bloquer l'interface.
+"""
+
+import logging
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+logger = logging.getLogger(__name__)
+
+
+class DicomLoadWorker(QObject):
+    """
+    Worker Qt pour la lecture d'un dossier DICOM.
+
+    Signaux :
+        progress(int, str)  — pourcentage + message
+        finished(object)    — PatientData chargé
+        error(str)          — message d'erreur
+    """
+
+    progress = Signal(int, str)
+    finished = Signal(object)
+    error = Signal(str)
+
+    def __init__(self, folder: str):
+        """
+        Args:
+            folder : dossier contenant la série DICOM
+        """
+        super().__init__()
+        self.folder = folder
+
+    @Slot()
+    def run(self):
+        """Charger le dossier dans le thread courant."""
+        try:
+            from app.data.dicom_loader import DICOMManager
+
+            self.progress.emit(0, "Lecture des fichiers DICOM...")
+            patient = DICOMManager().load_folder(self.folder)
+            self.finished.emit(patient)
+
+        except Exception as e:
+            logger.error(f"DicomLoadWorker erreur: {e}", exc_info=True)
+            self.error.emit(str(e))
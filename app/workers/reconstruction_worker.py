@@ -59,12 +59,16 @@ class ReconstructionWorker(QObject):
         """Exécuter la reconstruction dans le thread courant."""
         try:
             from app.ai.reconstruction.spine_reconstructor import SpineReconstructor
+            from app.core.config import Config
 
             reconstructor = SpineReconstructor(
                 hu_low=self.hu_low,
                 hu_high=self.hu_high,
                 step_size=self.step_size,
                 decimate_ratio=self.decimate_ratio,
+                cache_dir=Config().get('dicom/volume_cache_dir'),
+                cache_max_mb=Config().get('dicom/volume_cache_max_mb'),
+                label_stride=Config().get('ai/reconstruction/label_stride', 1),
             )
 
             def _progress_cb(pct, msg):
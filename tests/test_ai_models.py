@@ -114,6 +114,40 @@ class TestBoneSegmenter(unittest.TestCase):
         self.assertGreaterEqual(pct, 0.0)
         self.assertLessEqual(pct, 100.0)
 
+    def test_cleanup_keep_largest(self):
+        """keep='largest' ne doit conserver que la plus grande composante."""
+        volume = np.full((40, 40, 40), -500, dtype=np.float32)
+        volume[5:20, 5:20, 5:20] = 900     # 3375 voxels
+        volume[25:35, 2:12, 2:12] = 900    # 1000 voxels
+        mask_all = self.segmenter.segment_with_cleanup(volume, min_size=500)
+        mask_largest = self.segmenter.segment_with_cleanup(volume, keep='largest')
+        self.assertEqual(int(mask_all.sum()), 3375 + 1000)
+        self.assertEqual(int(mask_largest.sum()), 3375)
+
+    def test_cleanup_full_resolution_matches_voxel_labeling(self):
+        """label_stride=1 doit reproduire ndimage.label + filtrage min_size."""
+        from scipy.ndimage import label, binary_fill_holes
+
+        rng = np.random.default_rng(0)
+        volume = np.full((30, 48, 48), -500, dtype=np.float32)
+        for _ in range(40):
+            z, y, x = rng.integers(0, 44, size=3)
+            dz, dy, dx = rng.integers(1, 9, size=3)
+            volume[z:z + dz, y:y + dy, x:x + dx] = 900
+
+        expected = self.segmenter.segment(volume)
+        for z in range(expected.shape[0]):
+            expected[z] = binary_fill_holes(expected[z])
+        labeled, num = label(expected)
+        sizes = np.bincount(labeled.ravel())
+        keep = sizes >= 60
+        keep[0] = False
+        expected = keep[labeled]
+
+        mask = self.segmenter.segment_with_cleanup(volume, min_size=60, label_stride=1)
+        self.assertGreater(num, 1)
+        np.testing.assert_array_equal(mask, expected)
+
     def test_all_presets_work(self):
         """Tous les presets doivent s'instancier sans erreur."""
         from app.ai.reconstruction.segmentation import BoneSegmenter
@@ -212,5 +246,66 @@ class TestSpineReconstructor(unittest.TestCase):
         self.assertGreater(results['stats']['mesh_vertices'], 0)
 
 
+    def test_volume_cache_atomic_write_and_lru_prune(self):
+        """Le cache volume s'écrit sans fichier temporaire résiduel et reste borné."""
+        import tempfile
+        from pathlib import Path
+        from app.ai.reconstruction.spine_reconstructor import SpineReconstructor
+
+        volume = np.zeros((16, 64, 64), dtype=np.float32)   # 256 Ko
+        with tempfile.TemporaryDirectory() as cache_dir:
+            reconstructor = SpineReconstructor(cache_dir=cache_dir, cache_max_mb=0.6)
+            for i, key in enumerate(("a", "b", "c")):
+                cache_file = Path(cache_dir) / f"{key}.npy"
+                reconstructor._write_cache(cache_file, volume, (1.0, 1.0, 1.0))
+                # atime croissant : "a" est le moins récemment utilisé
+                os.utime(cache_file, (1000 + i, 1000 + i))
+
+            names = sorted(p.name for p in Path(cache_dir).iterdir())
+            self.assertEqual(names, ["b.json", "b.npy", "c.json", "c.npy"])
+            self.assertEqual(np.load(Path(cache_dir) / "c.npy", mmap_mode='r').shape, volume.shape)
+
+
+# ============================================================
+class TestVertebraDetector(unittest.TestCase):
+
+    def create_spine_mask(self):
+        """Quatre corps vertébraux de 10 coupes séparés par des disques de 3 coupes."""
+        mask = np.zeros((52, 40, 40), dtype=bool)
+        for i in range(4):
+            z = i * 13
+            mask[z:z + 10, 10:30, 10:30] = True
+            mask[z + 10:z + 13, 18:21, 18:21] = True   # disque : peu d'os
+        return mask
+
+    def test_boundaries_on_discs(self):
+        """Avec le profil pleine résolution (défaut), les limites tombent au centre des disques."""
+        from app.ai.detection.vertebra_detector import VertebraDetector
+        mask = self.create_spine_mask()
+        volume = np.where(mask, 400, -500).astype(np.float32)
+
+        detector = VertebraDetector()
+        self.assertEqual(detector.profile_stride, 1)
+        vertebrae = detector.detect(mask, volume)
+        self.assertEqual(
+            [(v['z_start'], v['z_end']) for v in vertebrae],
+            [(0, 11), (11, 24), (24, 37), (37, 51)],
+        )
+
+    def test_profile_stride_drift_within_one_slice(self):
+        """profile_stride > 1 ne décale les limites que d'une coupe au plus."""
+        from app.ai.detection.vertebra_detector import VertebraDetector
+        mask = self.create_spine_mask()
+        volume = np.where(mask, 400, -500).astype(np.float32)
+
+        reference = VertebraDetector().detect(mask, volume)
+        for stride in (2, 3):
+            strided = VertebraDetector(profile_stride=stride).detect(mask, volume)
+            self.assertEqual(len(strided), len(reference))
+            for a, b in zip(strided, reference):
+                self.assertLessEqual(abs(a['z_start'] - b['z_start']), 1)
+                self.assertLessEqual(abs(a['z_end'] - b['z_end']), 1)
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
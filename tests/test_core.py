@@ -0,0 +1,88 @@
+"""
+Tests unitaires pour le module core.
+Teste la sauvegarde groupée de Config (batch/save) dans un dossier temporaire.
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import yaml
+
+# Ajouter le chemin du projet
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# ============================================================
+class TestConfigSave(unittest.TestCase):
+
+    def setUp(self):
+        from app.core.config import Config
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_path = Path(self.tmp.name) / 'config.yaml'
+        self.config_path.write_text(yaml.safe_dump({'ui': {'theme': 'light', 'font_size': 12}}))
+
+        # Singleton neuf, configuration utilisateur lue depuis le dossier temporaire
+        Config._instance = None
+        Config._dirty = {}
+        self.config = Config()
+        self.config._ensure_loaded()
+        self.config._config['paths']['base_dir'] = self.tmp.name
+        self.config._dirty = {}
+
+    def tearDown(self):
+        from app.core.config import Config
+        Config._instance = None
+        Config._dirty = {}
+        self.tmp.cleanup()
+
+    def read_file(self):
+        return yaml.safe_load(self.config_path.read_text())
+
+    def test_nested_batch_saves_once_at_outermost_exit(self):
+        """Seul le bloc batch() le plus externe écrit config.yaml."""
+        with self.config.batch():
+            self.config.set('ui/theme', 'dark')
+            with self.config.batch():
+                self.config.set('ui/language', 'en')
+            self.assertEqual(self.read_file(), {'ui': {'theme': 'light', 'font_size': 12}})
+        self.assertEqual(self.config.get('ui/language'), 'en')
+        self.assertEqual(
+            self.read_file(),
+            {'ui': {'theme': 'dark', 'font_size': 12, 'language': 'en'}},
+        )
+
+    def test_batch_does_not_save_on_exception(self):
+        """Une exception dans le bloc empêche toute écriture."""
+        with self.assertRaises(RuntimeError):
+            with self.config.batch():
+                self.config.set('ui/theme', 'dark')
+                raise RuntimeError("échec")
+        self.assertEqual(self.read_file(), {'ui': {'theme': 'light', 'font_size': 12}})
+
+    def test_save_merges_only_modified_keys(self):
+        """save() fusionne les clés modifiées sans recopier les valeurs par défaut."""
+        self.config.update({'ai/detection/num_workers': 4})
+        self.config.save()
+        data = self.read_file()
+        self.assertEqual(data['ui'], {'theme': 'light', 'font_size': 12})
+        self.assertEqual(data['ai'], {'detection': {'num_workers': 4}})
+        self.assertNotIn('paths', data)
+
+    def test_save_raises_on_corrupt_file(self):
+        """config.yaml illisible : OSError, fichier intact, valeurs conservées."""
+        corrupt = 'ui: [unclosed\n'
+        self.config_path.write_text(corrupt)
+        self.config.set('ui/theme', 'dark')
+        with self.assertLogs('app.core.config', level='ERROR'):
+            with self.assertRaises(OSError):
+                with self.config.batch():
+                    self.config.update({'ui/language': 'en'})
+        self.assertEqual(self.config_path.read_text(), corrupt)
+        self.assertEqual(set(self.config._dirty), {'ui/theme', 'ui/language'})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,115 @@
+"""
+Tests unitaires pour le chargeur DICOM.
+Teste la lecture directe de PixelData et la construction du volume HU
+sur des datasets pydicom synthétiques (sans fichiers sur disque).
+"""
+
+import sys
+import os
+import unittest
+import numpy as np
+
+# Ajouter le chemin du projet
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def create_dataset(pixels, bits_stored=None, signed=False, slope=None, intercept=None):
+    """Crée un dataset monochrome non compressé (little endian) à partir des octets bruts."""
+    from pydicom.dataset import Dataset, FileMetaDataset
+    from pydicom.uid import ExplicitVRLittleEndian
+
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    bits = pixels.dtype.itemsize * 8
+    ds.Rows, ds.Columns = pixels.shape
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = 'MONOCHROME2'
+    ds.BitsAllocated = bits
+    ds.BitsStored = bits_stored or bits
+    ds.HighBit = ds.BitsStored - 1
+    ds.PixelRepresentation = 1 if signed else 0
+    ds.PixelData = pixels.astype(pixels.dtype.newbyteorder('<')).tobytes()
+    if slope is not None:
+        ds.RescaleSlope = slope
+    if intercept is not None:
+        ds.RescaleIntercept = intercept
+    return ds
+
+
+# ============================================================
+class TestUncompressedPixels(unittest.TestCase):
+
+    def setUp(self):
+        from app.data.dicom_loader import DICOMManager
+        self.rng = np.random.default_rng(0)
+        self.decode = DICOMManager._uncompressed_pixels
+
+    def assert_matches_pydicom(self, ds):
+        arr = self.decode(ds)
+        self.assertIsNotNone(arr)
+        self.assertEqual(arr.dtype, ds.pixel_array.dtype)
+        np.testing.assert_array_equal(arr, ds.pixel_array)
+
+    def test_int16_bits_stored_12(self):
+        """int16 sur 12 bits : extension de signe depuis le bit 11, comme pydicom."""
+        stored = self.rng.integers(-2048, 2048, size=(8, 10)).astype(np.int16)
+        # Bits 12-15 arbitraires, ignorés par pixel_array
+        garbage = self.rng.integers(0, 16, size=stored.shape).astype(np.uint16) << 12
+        raw = ((stored.view(np.uint16) & 0x0FFF) | garbage).view(np.int16)
+        self.assert_matches_pydicom(create_dataset(raw, bits_stored=12, signed=True))
+
+    def test_uint16_high_garbage_bits(self):
+        """uint16 sur 12 bits : les bits hauts parasites sont masqués."""
+        raw = self.rng.integers(0, 1 << 16, size=(8, 10)).astype(np.uint16)
+        self.assert_matches_pydicom(create_dataset(raw, bits_stored=12))
+
+    def test_uint8(self):
+        """uint8 plein : lecture directe sans transformation."""
+        raw = self.rng.integers(0, 256, size=(6, 12)).astype(np.uint8)
+        self.assert_matches_pydicom(create_dataset(raw))
+
+    def test_compressed_syntax_falls_back(self):
+        """Syntaxe compressée : None, le décodage est laissé à pydicom."""
+        from pydicom.uid import JPEGBaseline8Bit
+        ds = create_dataset(np.zeros((4, 4), dtype=np.uint8))
+        ds.file_meta.TransferSyntaxUID = JPEGBaseline8Bit
+        self.assertIsNone(self.decode(ds))
+
+
+# ============================================================
+class TestVolumeArray(unittest.TestCase):
+
+    def load(self, slices):
+        from app.data.dicom_loader import DICOMManager, PatientData
+        manager = DICOMManager()
+        manager.current_patient = PatientData(id='test', info={}, slices=slices)
+        return manager.get_volume_array()
+
+    def test_uniform_rescale(self):
+        """Slope/intercept identiques sur la série : correction scalaire."""
+        raws = [np.full((4, 5), v, dtype=np.int16) for v in (0, 100, 1000)]
+        slices = [create_dataset(r, signed=True, slope=2, intercept=-1024) for r in raws]
+        volume = self.load(slices)
+        self.assertEqual(volume.dtype, np.float32)
+        expected = np.stack(raws).astype(np.float32) * 2 - 1024
+        np.testing.assert_array_equal(volume, expected)
+
+    def test_per_slice_rescale(self):
+        """Slope/intercept différents par coupe : correction coupe par coupe."""
+        raws = [np.arange(20, dtype=np.uint16).reshape(4, 5) + 10 * i for i in range(3)]
+        params = [(1, -1024), (0.5, 0), (2, -1000)]
+        slices = [create_dataset(r, slope=s, intercept=b) for r, (s, b) in zip(raws, params)]
+        volume = self.load(slices)
+        expected = np.stack([r.astype(np.float32) * s + b for r, (s, b) in zip(raws, params)])
+        np.testing.assert_allclose(volume, expected)
+
+    def test_missing_rescale_tags(self):
+        """Sans RescaleSlope/Intercept : valeurs brutes en float32."""
+        raws = [np.arange(20, dtype=np.int16).reshape(4, 5) - 10 for _ in range(2)]
+        volume = self.load([create_dataset(r, signed=True) for r in raws])
+        np.testing.assert_array_equal(volume, np.stack(raws).astype(np.float32))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)